@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the healthcheck publish pipeline against synthetic urlconfs.
+
+Generates a urlconf with N routes whose healthchecks are attached with `url(..., healthcheck=...)` (a mix of args,
+kwargs, current_app and querystrings, and a few repeated combinations of tags), then times `populate()` walking the
+URLconf, `IdempotentHealthcheckClient.drain()`, `Healthcheck.serialize()`, JSON encoding of the payload and the
+startup path, `healthchecks.put()`, against a local stub HTTP server.
+
+Usage, from the repository root:
+
+    python benchmarks/benchmark.py                  # run and compare against benchmarks/baseline.json
+    python benchmarks/benchmark.py --save           # run and store the results as the new baseline
+    python benchmarks/benchmark.py --sizes 100 1000 --repeat 5
+
+Exits with status 1 when any measurement is slower than the baseline by more than --tolerance.
+"""
+from __future__ import print_function, unicode_literals
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+URLCONF = 'benchmark_urls'
+
+sys.path.insert(0, ROOT)
+
+import django
+from django.conf import settings
+
+settings.configure(
+    DEBUG=False,
+    ALLOWED_HOSTS=['example.com'],
+    ROOT_URLCONF=URLCONF,
+    HEALTHCHECKS={'API_KEY': 'benchmark', 'HTTPS': True, 'TAGS': ['benchmark', 'django']},
+)
+django.setup()
+
+from django.urls import clear_url_caches
+from django_auto_healthchecks import healthchecks
+from tests import StubCronitorServer
+
+
+PHASES = ('populate', 'drain', 'serialize', 'encode', 'put')
+
+TAGS = (None, ['web'], ('api', 'web'), ['django', 'auth'], ['web', 'api', 'v2'])
+""" Tags given to the generated healthchecks, in turn. Real urlconfs repeat a handful of tag lists across many
+routes. """
+
+
+def noop(request, *args, **kwargs):
+    pass
+
+
+def definitions(n):
+    """ Build N (regex, route name, Healthcheck kwargs) route definitions covering each way a route can be reversed
+    :return: list[tuple] """
+    routes = []
+    for i in range(n):
+        name = 'route-{}'.format(i)
+        kind = i % 4
+        if kind == 0:
+            routes.append((r'^r{}/$'.format(i), name, {}))
+        elif kind == 1:
+            routes.append((r'^r{}/(\d+)/$'.format(i), name, {'args': (i,)}))
+        elif kind == 2:
+            routes.append((r'^r{}/(?P<slug>[-\w]+)/$'.format(i), name, {'kwargs': {'slug': 'item-{}'.format(i)}}))
+        else:
+            routes.append((r'^r{}/$'.format(i), name, {'current_app': 'benchmark', 'querystring': {'q': i}}))
+
+        tags = TAGS[i % len(TAGS)]
+        if tags:
+            routes[-1][2]['tags'] = list(tags) if isinstance(tags, list) else tags
+
+    return routes
+
+
+def install_urlconf(routes):
+    """ Install a urlconf module for the given routes, as if it were a urls.py """
+    module = types.ModuleType(str(URLCONF))
+    module.urlpatterns = [
+        healthchecks.url(regex, noop, name=name, healthcheck=healthchecks.Healthcheck(**kwargs))
+        for regex, name, kwargs in routes
+    ]
+    sys.modules[URLCONF] = module
+    clear_url_caches()
+
+
+def populated():
+    """ :return: IdempotentHealthcheckClient The shared client, holding every healthcheck in the urlconf """
+    healthchecks.Client.drain()
+    healthchecks.populate()
+    return healthchecks.Client
+
+
+def timed(setup, measure, repeat):
+    """ Call `measure(setup())` `repeat` times, timing only `measure`
+    :return: float Fastest run, in seconds """
+    best = None
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        started = time.time()
+        measure(state)
+        elapsed = time.time() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def run(n, repeat, server):
+    """ :return: dict Seconds taken by each phase for N healthchecks, and the payload size """
+    install_urlconf(definitions(n))
+    healthchecks.Client._flush_messages_to_log = lambda: None
+
+    def drained():
+        return populated().drain()
+
+    def serialize(checks):
+        return [healthcheck.serialize() for healthcheck in checks]
+
+    payload = serialize(drained())
+
+    # Prime Django's resolver so its one-off population is not attributed to the first phase
+    drained()
+    results = {
+        'populate': timed(healthchecks.Client.drain, lambda _: healthchecks.populate(), repeat),
+        'drain': timed(populated, lambda client: client.drain(), repeat),
+        'serialize': timed(drained, serialize, repeat),
+        'encode': timed(lambda: payload, json.dumps, repeat),
+        'put': timed(healthchecks.Client.drain, lambda _: healthchecks.put(), repeat),
+        'payload_bytes': len(json.dumps(payload)),
+    }
+    assert len(server.requests) == repeat, 'Expected one PUT per put() run'
+    assert len(server.payloads()[-1]) == n, 'Expected put() to publish every healthcheck in the urlconf'
+    del server.requests[:]
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """ :return: list[str] Regressions found """
+    regressions = []
+    for n, phases in sorted(results.items(), key=lambda item: int(item[0])):
+        for phase, value in sorted(phases.items()):
+            if phase == 'payload_bytes':
+                continue
+
+            expected = baseline.get('results', {}).get(n, {}).get(phase)
+            if expected and value > expected * (1 + tolerance):
+                regressions.append('N={} {}: {:.4f}s vs baseline {:.4f}s'.format(n, phase, value, expected))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Numbers of healthchecks')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the fastest is reported')
+    parser.add_argument('--save', action='store_true', help='Store results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown vs baseline, e.g. 0.25')
+    args = parser.parse_args()
+
+    results = {}
+    with StubCronitorServer() as server:
+        healthchecks.ENDPOINT_URL = server.url
+        for n in args.sizes:
+            results[str(n)] = run(n, args.repeat, server)
+            print('N={:<7} '.format(n) + '  '.join(
+                '{}={:.4f}s'.format(phase, results[str(n)][phase]) for phase in PHASES
+            ) + '  payload={}KB'.format(results[str(n)]['payload_bytes'] // 1024))
+
+    if args.save:
+        with open(BASELINE, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Saved baseline to {}'.format(os.path.relpath(BASELINE)))
+        return 0
+
+    if not os.path.exists(BASELINE):
+        print('No baseline found. Run with --save to create one.')
+        return 0
+
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print('REGRESSION ' + regression)
+
+    if baseline.get('environment') != environment():
+        print('Note: baseline was recorded on {}'.format(baseline.get('environment')))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
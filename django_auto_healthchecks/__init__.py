@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 from . import healthchecks
+import sys
 
 __version__ = '0.1.5'
 
 url = healthchecks.url
 """ url is a drop-in replacement for django URL that adds a new healthcheck kwarg """
 
+path = healthchecks.path
+""" path is a drop-in replacement for django.urls.path (Django 2.0+) that adds a new healthcheck kwarg """
+
+re_path = healthchecks.re_path
+""" re_path is a drop-in replacement for django.urls.re_path that adds a new healthcheck kwarg """
+
 put = healthchecks.put
 """ Optionally, use the put method to batch create/update healthcheck definitions """
 
@@ -17,4 +24,11 @@ Healthcheck = healthchecks.Healthcheck
 
 Client = healthchecks.Client
 
+if sys.version_info >= (3, 5):
+    def aput(healthchecks=(), force=False):
+        """ Optionally, await aput from an ASGI lifespan startup handler to publish without blocking the event loop.
+        asyncio is only imported when aput is first called. """
+        from . import aio
+        return aio.aput(healthchecks, force=force)
+
 default_app_config = 'django_auto_healthchecks.apps.HealthchecksAppConfig'
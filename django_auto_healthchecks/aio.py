@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+""" asyncio publishing API for ASGI deployments. Requires Python 3.5+ """
+from concurrent.futures import ThreadPoolExecutor
+from . import healthchecks as _healthchecks
+import asyncio
+import logging
+import time
+
+
+class AsyncHealthcheckClient(object):
+    """
+    Put enqueued healthchecks to the Cronitor API from a running event loop without blocking it.
+
+    Drains the queue of an `IdempotentHealthcheckClient` and reuses its serialization, cross-process coordination and
+    retry logic. Blocking work runs in an executor and batches are uploaded concurrently.
+    """
+
+    def __init__(self, client=None):
+        """ client (IdempotentHealthcheckClient): Client whose queue is published. Defaults to the module `Client`
+        that `url()` enqueues into. """
+        self.client = client or _healthchecks.Client
+
+    async def put(self, additional_healthchecks=None, force=False):
+        """ Async equivalent of `IdempotentHealthcheckClient.put()`. PUBLISH_MODE is ignored: awaiting this coroutine
+        never blocks the event loop.
+        additional_healthchecks (list[Healthcheck]): Healthchecks to publish alongside any defined in urls.py
+        force (bool): Publish even if the payload is unchanged since the last successful publish """
+        client = self.client
+        loop = asyncio.get_event_loop()
+        client._instrumentation = _healthchecks._get_instrumentation()
+
+        # One worker runs the client's publish steps while the others upload batches
+        executor = ThreadPoolExecutor(max_workers=max(1, _healthchecks._get_setting('PUBLISH_CONCURRENCY')) + 1)
+
+        def send(payload, api_key):
+            # Called from the executor: upload on the event loop and wait for the result
+            return asyncio.run_coroutine_threadsafe(self._send(loop, executor, payload, api_key), loop).result()
+
+        try:
+            payload = await loop.run_in_executor(executor, client._prepare, additional_healthchecks)
+            if payload is not None:
+                force = force or _healthchecks._get_setting('FORCE_PUBLISH')
+                await loop.run_in_executor(executor, client._publish, payload, force, send)
+        except _healthchecks.HealthcheckError as e:
+            client._messages.append((logging.ERROR, str(e)))
+        finally:
+            executor.shutdown(wait=False)
+            client._flush_messages_to_log()
+
+    async def _send(self, loop, executor, payload, api_key):
+        """ Upload each batch concurrently, bounded by the executor's PUBLISH_CONCURRENCY workers
+        :return: list[dict] Definitions that were published """
+        if not payload:
+            return []
+
+        client = self.client
+        batches = _healthchecks._batches(payload, _healthchecks._get_setting('BATCH_SIZE'))
+        session = client._get_session()
+        deadline = time.time() + _healthchecks._get_setting('PUBLISH_DEADLINE')
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, client._send_batch, session, api_key, deadline, batch, i, len(batches))
+            for i, batch in enumerate(batches, 1)
+        ])
+        return client._sent(payload, batches, list(results))
+
+
+async def aput(healthchecks=(), force=False):
+    """ Async equivalent of `put()`. Await it from an ASGI lifespan startup handler to publish healthchecks without
+    holding up the event loop.
+    :param healthchecks: list[Healthcheck] of Healthcheck objects that will be merged with any defined in urls.py
+    :param force: Publish even if these healthchecks are unchanged since they were last published. """
+    _healthchecks.populate()
+    await AsyncHealthcheckClient().put(healthchecks, force=force)
+    if _healthchecks._get_setting('RELEASE_AFTER_PUBLISH'):
+        _healthchecks.release()
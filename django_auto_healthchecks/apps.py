@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 from django.apps import AppConfig
-from django.core.urlresolvers import reverse
-import django.urls.exceptions
 from . import healthchecks
 
 
@@ -11,10 +9,13 @@ class HealthchecksAppConfig(AppConfig):
     name = 'django_auto_healthchecks'
 
     def ready(self):
-        try:
-            reverse('request-a-route-to-parse-urls-and-populate-healthchecks')
-        except django.urls.exceptions.NoReverseMatch:
-            pass
-        finally:
-            # Any healthecks defined in urls.py will be parsed and ready to PUT now.
-            healthchecks.put()
+        # Set settings.HEALTHCHECKS['AUTO_PUBLISH'] to False to publish once from a deploy step with
+        # `manage.py healthchecks publish` instead of from every process at startup.
+        if not healthchecks._get_setting('AUTO_PUBLISH') or healthchecks._running_command():
+            return
+
+        if not healthchecks._definitions_enabled():
+            return
+
+        # Any healthchecks defined in urls.py are collected by put()
+        healthchecks.put()
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import errno
+import json
+import os
+import re
+import stat
+import tempfile
+import time
+import uuid
+
+KEY_PREFIX = 'django_auto_healthchecks'
+
+
+class BaseStore(object):
+    """ Key/value store shared between processes. Used to coordinate publishing across workers and to remember
+    what was last published. Values must be JSON serializable. """
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, timeout=None):
+        """ Store a value, replacing any existing value.
+        timeout (int): Seconds until the value expires. Never expires when None. """
+        raise NotImplementedError
+
+    def add(self, key, value, timeout=None):
+        """ Atomically store a value only if the key does not exist (or has expired).
+        :return: bool True if the value was stored """
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class FileStore(BaseStore):
+    """ Store each key as a small JSON file in a local directory. Suitable for coordinating workers on one host. """
+
+    def __init__(self, directory=None):
+        """ directory (str): Where entries are kept. Defaults to default_directory(). """
+        self.directory = directory or default_directory()
+        self.private = directory is None
+
+    def get(self, key, default=None):
+        if self.private:
+            ensure_private_directory(self.directory)
+
+        entry = self._read(self._path(key))
+        if entry is None or self._expired(entry):
+            return default
+
+        return entry['value']
+
+    def set(self, key, value, timeout=None):
+        ensure_directory(self.directory, self.private)
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(self._encode(value, timeout))
+
+        # os.rename() cannot replace an existing file on Windows
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+
+    def add(self, key, value, timeout=None):
+        ensure_directory(self.directory, self.private)
+        path = self._path(key)
+        for attempt in (1, 2):
+            if self._create(path, self._encode(value, timeout)):
+                return True
+
+            # A stale entry left behind by a crashed process should not block future attempts
+            if attempt == 2 or not self._remove_stale(path):
+                return False
+
+        return False
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _create(self, path, content):
+        """ Create a file unless it exists. The content is written to a temporary file that is then linked into place,
+        so other processes never read a file that is still being written.
+        :return: bool False if the file exists """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+
+            os.link(tmp_path, path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+            return False
+        finally:
+            os.remove(tmp_path)
+
+        return True
+
+    def _remove_stale(self, path):
+        """ Remove an expired or corrupt entry, unless another process replaced it since it was read. The entry is
+        renamed aside first, which only one process can do, and put back if it is not the entry that was read.
+        :return: bool True if the entry is gone """
+        content = self._read_text(path)
+        if content is None:
+            return True
+
+        entry = self._decode(content)
+        if entry is not None and not self._expired(entry):
+            return False
+
+        aside = '{}.{}.stale'.format(path, uuid.uuid4().hex)
+        try:
+            os.rename(path, aside)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+            # Another process removed it first
+            return True
+
+        try:
+            if self._read_text(aside) == content:
+                return True
+
+            # A fresh entry replaced the stale one before it was renamed
+            try:
+                os.link(aside, path)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+            return False
+        finally:
+            os.remove(aside)
+
+    def _path(self, key):
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.json')
+
+    @staticmethod
+    def _encode(value, timeout):
+        expires = time.time() + timeout if timeout is not None else None
+        return json.dumps({'value': value, 'expires': expires})
+
+    @classmethod
+    def _read(cls, path):
+        return cls._decode(cls._read_text(path))
+
+    @staticmethod
+    def _read_text(path):
+        """ :return: str|None The content of a file, or None if it does not exist """
+        try:
+            with open(path) as f:
+                return f.read()
+        except (IOError, OSError):
+            return None
+
+    @staticmethod
+    def _decode(content):
+        """ :return: dict|None The entry, or None if the content is missing or corrupt """
+        try:
+            return json.loads(content)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _expired(entry):
+        return entry.get('expires') is not None and entry['expires'] <= time.time()
+
+
+class CacheStore(BaseStore):
+    """ Store keys in a Django cache. When the cache is shared (e.g. memcached or redis), publishing is coordinated
+    across every host, not only the workers on a single host. """
+
+    def __init__(self, alias='default'):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+
+    def get(self, key, default=None):
+        return self.cache.get(self._key(key), default)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(self._key(key), value, timeout)
+
+    def add(self, key, value, timeout=None):
+        return self.cache.add(self._key(key), value, timeout)
+
+    def delete(self, key):
+        self.cache.delete(self._key(key))
+
+    @staticmethod
+    def _key(key):
+        return '{}:{}'.format(KEY_PREFIX, key)
+
+
+def default_directory():
+    """ Directory used when settings.HEALTHCHECKS['STORE_DIR'] or ['OUTBOX_DIR'] is not set. It must be private to
+    the current user, see ensure_private_directory().
+    :return: str """
+    return os.path.join(tempfile.gettempdir(), KEY_PREFIX)
+
+
+def ensure_directory(directory, private=False):
+    """ Create a directory unless it exists
+    private (bool): True for default_directory(), which is checked by ensure_private_directory() """
+    if private:
+        ensure_private_directory(directory)
+        return
+
+    try:
+        os.makedirs(directory)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+
+def ensure_private_directory(directory):
+    """ Create a directory only the current user can use, or check that an existing one is. Its path in the system temp
+    directory is predictable, so another user could create it first to read entries or plant their own.
+    :raise OSError: If the path is not a directory, e.g. a symlink, or belongs to another user """
+    try:
+        os.makedirs(directory, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+
+    if not hasattr(os, 'getuid'):
+        # Windows has no owners to check, and the temp directory is per user
+        return
+
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise OSError(
+            errno.EPERM,
+            'Refusing to use {}: it must be a directory owned by the current user. Set STORE_DIR and OUTBOX_DIR to '
+            'choose another directory.'.format(directory)
+        )
+
+    if stat.S_IMODE(st.st_mode) & 0o077:
+        # Created by an earlier version, or with a permissive umask
+        os.chmod(directory, 0o700)
+
+
+def get_store(backend, directory=None, cache_alias='default'):
+    """ Build a store from the settings.HEALTHCHECKS['STORE'] value.
+    backend (str): 'file', 'cache', a dotted path to a BaseStore subclass, or None to disable coordination.
+    :return: BaseStore|None """
+    if not backend:
+        return None
+
+    if backend == 'file':
+        return FileStore(directory)
+
+    if backend == 'cache':
+        return CacheStore(cache_alias)
+
+    from django.utils.module_loading import import_string
+    return import_string(backend)()
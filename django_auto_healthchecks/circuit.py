@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import time
+
+FAILURES_KEY = 'circuit-failures'
+
+OPEN_KEY = 'circuit-open'
+
+PROBE_KEY = 'circuit-probe'
+
+
+class CircuitBreaker(object):
+    """ Stop every process from waiting out request timeouts while the Cronitor API is unreachable. State is kept in a
+    shared store: after `threshold` consecutive failed publishes the circuit opens and publishing is skipped for
+    `cooldown` seconds. Once the cool-down has passed the circuit is half-open, and a single process is allowed to
+    probe the API. Its outcome closes the circuit or opens it for another cool-down. """
+
+    def __init__(self, store, threshold, cooldown):
+        """ store (backends.BaseStore): Store shared by the processes that publish
+        threshold (int): Consecutive failed publishes that open the circuit
+        cooldown (int): Seconds publishing is skipped once the circuit opens """
+        self.store = store
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+    def allow(self):
+        """ :return: bool True if this process may publish """
+        if self.is_closed():
+            return True
+
+        if self.store.get(OPEN_KEY) is not None:
+            return False
+
+        # Half-open. If the probing process dies, its claim expires and another process probes.
+        return self.store.add(PROBE_KEY, os.getpid(), self.cooldown)
+
+    def is_closed(self):
+        """ :return: bool True if the last publishes reached the API, without claiming a half-open probe """
+        return self.store.get(OPEN_KEY) is None and (self.store.get(FAILURES_KEY) or 0) < self.threshold
+
+    def record_success(self):
+        self.store.delete(FAILURES_KEY)
+        self.store.delete(PROBE_KEY)
+
+    def record_failure(self):
+        """ Count a failed publish. Concurrent failures may be counted once, which only delays opening the circuit. """
+        failures = (self.store.get(FAILURES_KEY) or 0) + 1
+        self.store.set(FAILURES_KEY, failures)
+        if failures >= self.threshold:
+            self.store.set(OPEN_KEY, time.time(), self.cooldown)
+            self.store.delete(PROBE_KEY)
+
+    def opened_at(self):
+        """ :return: float|None When the circuit last opened, or None if it is not open """
+        return self.store.get(OPEN_KEY)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import zlib
+
+
+class BaseCodec(object):
+    """ Compresses request bodies sent to the Cronitor API """
+
+    encoding = None
+    """ :type str Content-Encoding header value """
+
+    def compressor(self):
+        """ :return: An object with `compress(bytes)` and `flush()` methods, each returning compressed bytes """
+        raise NotImplementedError
+
+    def compress(self, data):
+        """ :return: bytes """
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.flush()
+
+
+class GzipCodec(BaseCodec):
+    encoding = 'gzip'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compressor(self):
+        # wbits=31 writes a gzip header and trailer
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+
+class ZstdCodec(BaseCodec):
+    """ Requires the `zstandard` package: pip install django_auto_healthchecks[zstd] """
+    encoding = 'zstd'
+
+    def __init__(self, level=3):
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level)
+
+    def compressor(self):
+        return self._compressor.compressobj()
+
+
+def get_codec(codec):
+    """ Build a codec from the settings.HEALTHCHECKS['COMPRESSION'] value.
+    codec (str): 'gzip', 'zstd', a dotted path to a BaseCodec subclass, or None to disable compression.
+    :return: BaseCodec|None """
+    if not codec:
+        return None
+
+    if codec == 'gzip':
+        return GzipCodec()
+
+    if codec == 'zstd':
+        return ZstdCodec()
+
+    from django.utils.module_loading import import_string
+    return import_string(codec)()
+
+
+def compress_stream(chunks, codec, sizes):
+    """ Compress a streamed request body
+    chunks (iterable[bytes]): Uncompressed body
+    codec (BaseCodec): Codec to compress with
+    sizes (dict): Updated with the 'raw' and 'compressed' byte counts as the body is consumed
+    :return: generator of bytes """
+    compressor = codec.compressor()
+    sizes['raw'] = sizes['compressed'] = 0
+    for chunk in chunks:
+        sizes['raw'] += len(chunk)
+        compressed = compressor.compress(chunk)
+        if compressed:
+            sizes['compressed'] += len(compressed)
+            yield compressed
+
+    compressed = compressor.flush()
+    sizes['compressed'] += len(compressed)
+    yield compressed
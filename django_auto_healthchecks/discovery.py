@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+PATTERN_ATTRIBUTE = 'healthcheck'
+""" :type str Attribute of a URL pattern holding the Healthcheck attached to it by url() """
+
+
+def discover(urlconf=None):
+    """ Walk the URLconf, including include()d and namespaced patterns, and collect the healthchecks attached to its
+    patterns. Each healthcheck route is set to the namespace-qualified name of its pattern, and `current_app` to the
+    enclosing namespace unless a hint was given. Only the urls.py modules are imported; Django's reverse lookup tables
+    are not built until a healthcheck is resolved.
+    urlconf (str): Optional URLconf module, defaults to settings.ROOT_URLCONF
+    :return: list[Healthcheck] """
+    found = []
+    for pattern, namespaces in _walk(_url_patterns(urlconf), ()):
+        healthcheck = attached(pattern)
+        if healthcheck is None:
+            continue
+
+        name = getattr(pattern, 'name', None)
+        if name:
+            healthcheck.route = ':'.join(namespaces + (name,))
+        if namespaces and not healthcheck.current_app:
+            healthcheck.current_app = ':'.join(namespaces)
+
+        found.append(healthcheck)
+
+    return found
+
+
+def detach(urlconf=None):
+    """ Remove the healthchecks attached to the URLconf's patterns so they can be garbage collected
+    urlconf (str): Optional URLconf module, defaults to settings.ROOT_URLCONF
+    :return: int Number of healthchecks detached """
+    detached = 0
+    for pattern, _ in _walk(_url_patterns(urlconf), ()):
+        if attached(pattern) is not None:
+            delattr(pattern, PATTERN_ATTRIBUTE)
+            detached += 1
+
+    return detached
+
+
+def attached(pattern):
+    """ :return: Healthcheck|None The healthcheck attached to a URL pattern """
+    return getattr(pattern, PATTERN_ATTRIBUTE, None)
+
+
+def _url_patterns(urlconf):
+    from django.urls import get_resolver
+    return get_resolver(urlconf).url_patterns
+
+
+def _walk(patterns, namespaces):
+    """ Yield every URL pattern, descending into resolvers created by include()
+    patterns (list): URL patterns and resolvers
+    namespaces (tuple[str]): Instance namespaces enclosing these patterns, outermost first
+    :return: generator of tuple(pattern, tuple[str]) """
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            namespace = getattr(pattern, 'namespace', None)
+            for found in _walk(pattern.url_patterns, namespaces + (namespace,) if namespace else namespaces):
+                yield found
+        else:
+            yield pattern, namespaces
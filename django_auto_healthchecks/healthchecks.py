@@ -1,18 +1,33 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
-from future.utils import python_2_unicode_compatible
-from future.standard_library import install_aliases
-install_aliases()
-from django.conf.urls import url as django_url
-from django.core.urlresolvers import reverse
+from future.utils import python_2_unicode_compatible, string_types
+from django.urls import reverse
+try:
+    from django.urls import path as django_path, re_path as django_re_path
+except ImportError:  # Django < 2.0
+    from django.conf.urls import url as django_re_path
+    django_path = None
+try:
+    from django.conf.urls import url as django_url
+except ImportError:  # Django >= 4.0
+    django_url = django_re_path
 from django.conf import settings
-from urllib.parse import urlencode
-import base64
+from django.core.signals import setting_changed
+try:
+    from urllib.parse import urlencode
+except ImportError:  # Python 2
+    from urllib import urlencode
+from collections import namedtuple
+from . import discovery
 import django.urls.exceptions
-import hashlib
-import json
 import logging
-import requests
+import os
+import sys
+import threading
+import time
+
+# Defining healthchecks in urls.py only needs the modules above. Everything used to serialize and publish them,
+# including requests, is imported inside the functions that need it so processes that never publish do not pay for it.
 
 ENDPOINT_URL = 'https://cronitor.io/v3/monitors'
 DOCS_URL = 'https://cronitor.io/docs/django-health-checks'
@@ -21,16 +36,72 @@ DEFAULTS = {
     'API_KEY': None,
     'HTTPS': False,
     'TAGS': [],
+    'PUBLISH_MODE': 'sync',
+    'PUBLISH_JOIN_TIMEOUT': 5,
+    'STORE': None,
+    'STORE_DIR': None,
+    'STORE_CACHE_ALIAS': 'default',
+    'PUBLISH_LOCK_TIMEOUT': 300,
+    'FORCE_PUBLISH': False,
+    'DIFF_PUBLISH': False,
+    'BATCH_SIZE': None,
+    'PUBLISH_CONCURRENCY': 4,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 5,
+    'MAX_RETRIES': 3,
+    'RETRY_BACKOFF': 0.5,
+    'PUBLISH_DEADLINE': 5,
+    'INSTRUMENTATION': False,
+    'INSTRUMENTATION_CALLBACK': None,
+    'AUTO_PUBLISH': True,
+    'DEFINITIONS': True,
+    'RELEASE_AFTER_PUBLISH': False,
+    'STREAM_THRESHOLD': None,
+    'DEBUG_PAYLOAD_LIMIT': None,
+    'COMPRESSION': None,
+    'COMPRESSION_THRESHOLD': 1024,
+    'OUTBOX': False,
+    'OUTBOX_DIR': None,
+    'OUTBOX_RETRY_DELAY': 30,
+    'CIRCUIT_BREAKER_THRESHOLD': None,
+    'CIRCUIT_BREAKER_COOLDOWN': 60,
 }
 
+PUBLISH_MODES = ('sync', 'background')
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+""" :type int Approximate size, in bytes, of each chunk of a streamed request body """
+
+OUTBOX_MAX_DELAY = 3600
+""" :type int Longest wait, in seconds, between background attempts to replay the outbox """
+
+_command_running = False
+""" :type bool Set by the `healthchecks` management command while it runs, however it was invoked """
+
 
 class HealthcheckError(RuntimeError):
     pass
 
 
+PublishPlan = namedtuple('PublishPlan', 'api_key scope store fingerprint lock_key manifest previous removed outgoing')
+""" What a process decided to publish: the definitions to send and the state needed to record the outcome """
+
+
 @python_2_unicode_compatible
 class Healthcheck(object):
 
+    def __new__(cls, *args, **kwargs):
+        # Processes that will never publish set settings.HEALTHCHECKS['DEFINITIONS'] to False and skip building
+        # definitions altogether. url() ignores the shared placeholder returned instead.
+        if not _definitions_enabled():
+            return DISABLED_HEALTHCHECK
+
+        return super(Healthcheck, cls).__new__(cls)
+
     def __init__(self, route=None, args=None, kwargs=None, current_app=None, name=None, key=None, method='GET',
                  querystring=None, body=None, headers=None, cookies=None, assertions=None, tags=None, note=None,
                  interval_seconds=None, timeout_seconds=None):
@@ -87,92 +158,88 @@ class Healthcheck(object):
         self.timeout_seconds = timeout_seconds
 
         # When in DEBUG mode, create monitors in Dev mode
-        self.is_dev = settings.DEBUG
+        self.is_dev = _settings().debug
 
         # These will be defined later during resolve():
         self._url = None
         self._defaultName = None
 
+        # Defined by validate()
+        self._errors = None
+
     def __str__(self):
         return self.name()
 
+    @property
+    def url(self):
+        """ Fully qualified URL requested by this healthcheck, available after resolve() """
+        return self._url.url if self._url else None
+
     def display_name(self):
         """ Retrieve the effective name of this healthcheck. """
         return self.name if self.name else self._defaultName
 
-    def resolve(self):
+    def validate(self):
+        """ Check this definition against what the Cronitor API accepts. The result is cached so healthchecks are
+        validated once, however many times they are drained.
+        :return: list[str] Every validation error, empty when the healthcheck is valid """
+        if self._errors is None:
+            from . import validation
+            self._errors = validation.validate(self)
+
+        return self._errors
+
+    def resolve(self, resolver=None):
         """ Because the route cannot be reversed into a URL at the same time its defined, we delay route resolution
-        until we are ready to submit the healthchecks to the API. """
-        self._url = HealthcheckUrl(
-            path=self._reverse(),
-            querystring=self.querystring
-        )
+        until we are ready to submit the healthchecks to the API.
+        resolver (RouteResolver): Optional resolver shared by every healthcheck in a drain() pass
+        :return: ResolvedHealthcheck """
+        path = self._reverse(resolver)
+        if resolver:
+            self._url = resolver.url(path, self.querystring)
+        else:
+            self._url = HealthcheckUrl(
+                path=path,
+                querystring=self.querystring
+            )
         self._defaultName = self._create_name()
         self.key = self.key if self.key else self._create_key()
+        return self.freeze()
 
     def serialize(self):
         """ Serialize current instance details into valid API payload
         :return: dict """
+        return self.freeze().serialize()
 
-        assert self.method in ('GET', 'POST', 'PUT', 'HEAD', 'OPTIONS', 'PATCH'), \
-            "Healthcheck request method must be GET, POST, PUT, HEAD, OPTIONS or PATCH"
-
-        request = {
-            'url': self._url.url,
-            'method': self.method
-        }
-        if self.cookies:
-            assert isinstance(self.cookies, dict), "Healthcheck request cookies must be a dict"
-            request['cookies'] = self.cookies
-        if self.headers:
-            assert isinstance(self.headers, dict), "Healthcheck request headers must be a dict"
-            request['headers'] = self.headers
-        if self.timeout_seconds:
-            assert isinstance(self.timeout_seconds, int), "Healthcheck request timeout_seconds must be an int"
-            request['timeout_seconds'] = self.timeout_seconds
-        if self.body:
-            request['body'] = self.body
-
-        definition = {
-            'type': 'healthcheck',
-            'key': self.key,
-            'defaultName': self._defaultName,
-            'request': request,
-            'dev': self.is_dev
-        }
-
-        if self.name:
-            definition['name'] = self.name
-
-        if self.assertions:
-            assert isinstance(self.assertions, (list, tuple, set)), \
-                "Healthcheck assertions must be a list, tuple or set"
-            definition['rules'] = self.assertions
-
-        if self.interval_seconds:
-            assert isinstance(self.interval_seconds, int), \
-                "Healthcheck interval_seconds must be an int"
-            definition['request_interval_seconds'] = self.interval_seconds
-
-        if self.tags:
-            assert isinstance(self.tags, (list, tuple, set)), \
-                "Healthcheck tags must be in a list, tuple or set"
-            definition['tags'] = set(self.tags + _get_setting('TAGS'))
-        elif _get_setting('TAGS'):
-            assert isinstance(_get_setting('TAGS'), (list, tuple, set)), \
-                "settings.HEALTHCHECKS['TAGS'] must be a list, tuple or set"
-            definition['tags'] = _get_setting('TAGS')
-
-        if self.note:
-            definition['note'] = self.note
-
-        return definition
+    def freeze(self):
+        """ Capture the details of this resolved healthcheck in an immutable, compact form
+        :return: ResolvedHealthcheck
+        :raises HealthcheckError """
+        if self._url is None:
+            raise HealthcheckError('Healthcheck for route {} must be resolved first'.format(self.route))
+
+        return ResolvedHealthcheck(
+            key=self.key,
+            name=self.name,
+            default_name=self._defaultName,
+            url=self._url.url,
+            method=self.method,
+            body=self.body,
+            headers=self.headers,
+            cookies=self.cookies,
+            assertions=self.assertions,
+            tags=self.tags,
+            note=self.note,
+            interval_seconds=self.interval_seconds,
+            timeout_seconds=self.timeout_seconds,
+            is_dev=self.is_dev,
+        )
 
-    def _reverse(self):
+    def _reverse(self, resolver=None):
         # The reverse() method accepts either kwargs or args, not both
 
         reverse_kwargs = {}
-        if self.kwargs and self.args and settings.DEBUG:
+        if self.kwargs and self.args and _settings().debug:
             raise HealthcheckError(
                 'Cannot reverse route "{}" with both args and kwargs.'.format(self.display_name())
             )
@@ -186,7 +253,7 @@ class Healthcheck(object):
             reverse_kwargs['current_app'] = self.current_app
 
         try:
-            return reverse(self.route, **reverse_kwargs)
+            return (resolver.reverse if resolver else reverse)(self.route, **reverse_kwargs)
         except django.urls.exceptions.NoReverseMatch:
             raise HealthcheckError(
                 'Could not reverse route for {}. '
@@ -207,11 +274,90 @@ class Healthcheck(object):
         versions of a monitor
         :return: str """
         env = 'dev' if self.is_dev else 'prod'
+        import base64
+        import hashlib
+
         signature = hashlib.sha1(env.encode() + self._defaultName.encode())
         keyhash = base64.b64encode(signature.digest())
         return keyhash[:12].decode('utf-8').replace('+', '').replace('/', '')
 
 
+class DisabledHealthcheck(object):
+    """ Placeholder returned by `Healthcheck()` when settings.HEALTHCHECKS['DEFINITIONS'] is False """
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<DisabledHealthcheck>'
+
+
+DISABLED_HEALTHCHECK = DisabledHealthcheck()
+
+
+RESOLVED_FIELDS = ('key name default_name url method body headers cookies assertions tags note interval_seconds '
+                   'timeout_seconds is_dev')
+""" :type str Fields of a ResolvedHealthcheck """
+
+
+class ResolvedHealthcheck(namedtuple('ResolvedHealthcheck', RESOLVED_FIELDS)):
+    """
+    Immutable form of a healthcheck produced by `Healthcheck.resolve()`. It holds only what is needed to publish or run
+    the healthcheck, without the route, reverse() arguments or URL parts. Equal definitions compare equal, and hashing
+    uses only the monitor key, so instances are cheap to deduplicate even though headers and cookies are dicts.
+    """
+    __slots__ = ()
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def display_name(self):
+        """ Retrieve the effective name of this healthcheck. """
+        return self.name if self.name else self.default_name
+
+    def serialize(self, tag_set=None):
+        """ Serialize current instance details into an API payload. Healthchecks are validated when drained, see
+        Healthcheck.validate().
+        tag_set (TagSet): Optional tag merger shared by every healthcheck in a payload
+        :return: dict """
+        request = {
+            'url': self.url,
+            'method': self.method
+        }
+        if self.cookies:
+            request['cookies'] = self.cookies
+        if self.headers:
+            request['headers'] = self.headers
+        if self.timeout_seconds:
+            request['timeout_seconds'] = self.timeout_seconds
+        if self.body:
+            request['body'] = self.body
+
+        definition = {
+            'type': 'healthcheck',
+            'key': self.key,
+            'defaultName': self.default_name,
+            'request': request,
+            'dev': self.is_dev
+        }
+
+        if self.name:
+            definition['name'] = self.name
+
+        if self.assertions:
+            definition['rules'] = self.assertions
+
+        if self.interval_seconds:
+            definition['request_interval_seconds'] = self.interval_seconds
+
+        tags = (tag_set or _settings().tag_set()).merge(self.tags)
+        if tags:
+            definition['tags'] = tags
+
+        if self.note:
+            definition['note'] = self.note
+
+        return definition
+
+
 class HealthcheckUrl(object):
 
     url = None
@@ -220,14 +366,19 @@ class HealthcheckUrl(object):
     display = None
     """ :type unicode Shorter, prettier version of URL for display """
 
-    def __init__(self, path, querystring):
-        scheme = 'https://' if _get_setting('HTTPS') else 'http://'
-        hostname = self._get_hostname()
+    def __init__(self, path, querystring, scheme=None, hostname=None):
+        """ path (str): Path returned by `reverse()`
+        querystring (dict): Optional querystring parameters
+        scheme (str): Optional scheme, e.g. 'https://'. Looked up from settings when omitted.
+        hostname (str): Optional hostname. Looked up from settings when omitted. """
+        scheme = scheme or _get_scheme()
+        hostname = hostname or self._get_hostname()
         querystring = '?{}'.format(urlencode(querystring)) if querystring else ''
         self.url = '{}{}{}{}'.format(scheme, hostname, path, querystring)
         self.display = '{}{}'.format(hostname, path)
 
-    def _get_hostname(self):
+    @staticmethod
+    def _get_hostname():
         """ Try to determine the hostname to use when making the healthcheck request
         :return: string
         :raises HealthcheckError """
@@ -259,6 +410,126 @@ class HealthcheckUrl(object):
         )
 
 
+class RouteResolver(object):
+    """
+    Resolve healthcheck routes into URLs during a single drain() pass. The scheme and hostname are looked up once, and
+    `reverse()` results are cached by route, args, kwargs and current_app.
+    """
+
+    hits = 0
+    """ :type int Number of reverse() calls answered from the cache """
+
+    misses = 0
+    """ :type int Number of reverse() calls passed through to Django """
+
+    def __init__(self):
+        self._cache = {}
+        self._scheme = None
+        self._hostname = None
+
+    def reverse(self, viewname, args=None, kwargs=None, current_app=None):
+        """ Memoized `django.urls.reverse()` """
+        try:
+            key = (viewname, tuple(args or ()), tuple(sorted((kwargs or {}).items())), current_app)
+            hash(key)
+        except TypeError:
+            # Unhashable or unorderable arguments cannot be cached
+            key = None
+
+        if key is not None and key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        reverse_kwargs = dict(
+            (k, v) for k, v in (('args', args), ('kwargs', kwargs), ('current_app', current_app)) if v
+        )
+        path = reverse(viewname, **reverse_kwargs)
+        if key is not None:
+            self._cache[key] = path
+
+        return path
+
+    def url(self, path, querystring):
+        """ :return: HealthcheckUrl """
+        if self._scheme is None:
+            self._scheme = _get_scheme()
+            self._hostname = HealthcheckUrl._get_hostname()
+
+        return HealthcheckUrl(path, querystring, scheme=self._scheme, hostname=self._hostname)
+
+    def stats(self):
+        """ :return: dict Cache hits, misses and hit rate """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+        }
+
+
+class SettingsSnapshot(object):
+    """
+    Frozen copy of settings.HEALTHCHECKS merged with DEFAULTS, and settings.DEBUG. Reading a setting is a dict lookup
+    instead of a trip through Django's LazySettings. A snapshot is taken once per drain() and dropped when Django sends
+    `setting_changed`, e.g. from override_settings().
+    """
+    __slots__ = ('source', 'values', 'debug', '_tag_set')
+
+    def __init__(self, source):
+        """ source (django.conf.LazySettings): Settings to copy """
+        self.source = source
+        self.values = dict(DEFAULTS)
+        if hasattr(source, 'HEALTHCHECKS'):
+            self.values.update(source.HEALTHCHECKS)
+        self.debug = getattr(source, 'DEBUG', False)
+        self._tag_set = None
+
+    def get(self, key):
+        """ :return: * The value of a setting
+        :raises HealthcheckError when the setting has no value or default """
+        try:
+            return self.values[key]
+        except KeyError:
+            raise HealthcheckError('Error: Could not find setting key {}'.format(key))
+
+    def tag_set(self):
+        """ :return: TagSet Merges healthcheck tags with settings.HEALTHCHECKS['TAGS'] """
+        if self._tag_set is None:
+            self._tag_set = TagSet(self.values['TAGS'])
+
+        return self._tag_set
+
+
+class TagSet(object):
+    """
+    Merge the tags of each healthcheck with global tags into a sorted tuple without duplicates, so payloads are
+    deterministic. The global tags are sorted once, each distinct list of tags is merged once, and healthchecks with
+    the same merged tags share a single tuple.
+    """
+
+    def __init__(self, global_tags):
+        """ global_tags (list|tuple|set): Tags added to every healthcheck, i.e. settings.HEALTHCHECKS['TAGS'] """
+        self.global_tags = frozenset(global_tags or ())
+        self.default = tuple(sorted(self.global_tags))
+        self._merged = {}
+        self._interned = {self.default: self.default}
+
+    def merge(self, tags):
+        """ tags (list|tuple|set): Tags of a healthcheck, may be None
+        :return: tuple[str] """
+        if not tags:
+            return self.default
+
+        key = frozenset(tags) if isinstance(tags, (set, frozenset)) else tuple(tags)
+        try:
+            return self._merged[key]
+        except KeyError:
+            merged = tuple(sorted(self.global_tags.union(tags)))
+            merged = self._merged[key] = self._interned.setdefault(merged, merged)
+            return merged
+
+
 class IdempotentHealthcheckClient(object):
     """
     Put enqueued healthchecks to the Cronitor API.
@@ -271,94 +542,760 @@ class IdempotentHealthcheckClient(object):
     """ Messages written to a `django_auto_healthchecks.healthchecks` logger
     :type list """
 
+    resolver_stats = None
+    """ Route resolution cache counters from the last drain(), see RouteResolver.stats()
+    :type dict """
+
+    _threads = None
+    """ Publisher threads started in background mode that may still be running
+    :type list """
+
     def __init__(self):
         self._queue = []
         self._messages = []
+        self._threads = []
+        self._join_registered = False
+        self._session = None
+        self._session_pid = None
+        self._instrumentation = None
+        self._outbox_thread = None
 
     def enqueue(self, healthcheck):
         """ Add a healthcheck instance to a queue for later processing.
         healthcheck (Healthcheck): Healthcheck instance to enqueue
         """
-        self._queue.append(healthcheck)
+        if healthcheck is not DISABLED_HEALTHCHECK:
+            self._queue.append(healthcheck)
 
     def drain(self):
-        """ Drain enqueued healthchecks and return a list of distinct Healthcheck objects
-        :return: List[Healthcheck]"""
+        """ Drain enqueued healthchecks, validate and resolve them. Invalid healthchecks are dropped, and every
+        validation error is logged at once. The queue no longer references the Healthcheck objects afterwards.
+        :return: List[ResolvedHealthcheck] Distinct, valid healthchecks """
+        _invalidate_settings()
+        started = time.time()
+        queued = len(self._queue)
         healthchecks = {}
+        seen = set()
+        invalid = []
+        resolver = RouteResolver()
         for healthcheck in self._queue:
-            healthcheck.resolve()
-            if healthcheck.key in healthchecks:
+            if id(healthcheck) in seen:
+                # Enqueued more than once, e.g. by repeated populate() calls
+                continue
+
+            seen.add(id(healthcheck))
+            errors = healthcheck.validate()
+            if errors:
+                invalid.append('{}: {}'.format(healthcheck.name or healthcheck.route, '; '.join(errors)))
+                continue
+
+            resolved = healthcheck.resolve(resolver)
+            if resolved.key in healthchecks:
                 self._messages.append((logging.WARN, 'Duplicate definition definition for {}, last one wins'.format(
-                    healthcheck.display_name()
+                    resolved.display_name()
                 )))
 
-            healthchecks[healthcheck.key] = healthcheck
+            healthchecks[resolved.key] = resolved
 
         self._queue = []
-        return healthchecks.values()
+        if invalid:
+            self._messages.append((
+                logging.ERROR,
+                '{} healthchecks can not be published. Validation errors:\n{}'.format(len(invalid), '\n'.join(invalid))
+            ))
+
+        self.resolver_stats = resolver.stats()
+        if resolver.hits or resolver.misses:
+            self._messages.append((
+                logging.DEBUG,
+                'Resolved {} healthcheck routes: {hits} cache hits, {misses} misses'.format(
+                    len(healthchecks), **self.resolver_stats
+                )
+            ))
+
+        if self._instrumentation:
+            self._instrumentation.emit('enqueue', None, count=queued)
+            self._instrumentation.emit(
+                'drain', time.time() - started, count=len(healthchecks), duplicates=queued - len(healthchecks),
+                **self.resolver_stats
+            )
+
+        return list(healthchecks.values())
 
-    def put(self, additional_healthchecks=None):
+    def put(self, additional_healthchecks=None, force=False):
+        """ Drain and serialize enqueued healthchecks, then PUT them to the Cronitor API. When
+        settings.HEALTHCHECKS['PUBLISH_MODE'] is 'background' the request is made from a daemon thread and this
+        method returns as soon as the payload is serialized.
+        additional_healthchecks (list[Healthcheck]): Healthchecks to publish alongside any defined in urls.py
+        force (bool): Publish even if the payload is unchanged since the last successful publish """
+
+        self._instrumentation = _get_instrumentation()
+        payload = self._prepare(additional_healthchecks)
+        if payload is not None:
+            try:
+                force = force or _get_setting('FORCE_PUBLISH')
+                if self._publish_mode() == 'background':
+                    self._publish_in_background(payload, force)
+                else:
+                    self._publish(payload, force)
+            except HealthcheckError as e:
+                self._messages.append((logging.ERROR, str(e)))
+
+        self._flush_messages_to_log()
+
+    def release(self):
+        """ Drop queued healthchecks and the pooled session. Publishes already running in background mode finish. """
+        self._queue = []
+        self._session = None
+        self._session_pid = None
+        self.resolver_stats = None
+
+    def join(self, timeout=None):
+        """ Wait for background publisher threads to finish.
+        timeout (float): Maximum seconds to wait across all threads. Defaults to
+                         settings.HEALTHCHECKS['PUBLISH_JOIN_TIMEOUT'] """
+        timeout = _get_setting('PUBLISH_JOIN_TIMEOUT') if timeout is None else timeout
+        deadline = time.time() + timeout
+        for thread in list(self._threads):
+            thread.join(max(0, deadline - time.time()))
+            if not thread.is_alive():
+                self._threads.remove(thread)
+
+        if self._threads:
+            logging.getLogger(__name__).warning(
+                'Cronitor healthchecks publisher did not finish within {} seconds'.format(timeout)
+            )
+
+    def _prepare(self, additional_healthchecks=None):
+        """ Drain the queue, along with any additional healthchecks, and serialize it into an API payload
+        :return: list[dict]|None None when no healthchecks are defined """
 
         # If healthchecks have been defined in a batch and passed here, add them to the queue containing any
         # checks defined in urls.py file(s)
-        map(self.enqueue, (additional_healthchecks or ()))
+        for healthcheck in additional_healthchecks or ():
+            self.enqueue(healthcheck)
+
         healthchecks = self.drain()
 
         if len(healthchecks) == 0:
             self._messages.append(
                 (logging.WARN, 'No health checks defined. See {} to get started.'.format(DOCS_URL))
             )
+            return None
+
+        try:
+            return self._serialize(healthchecks)
+        except HealthcheckError as e:
+            self._messages.append((logging.ERROR, str(e)))
+            return None
+
+    def _serialize(self, healthchecks):
+        """ Serialize drained healthchecks into an API payload
+        :return: list[dict]
+        :raises HealthcheckError when settings.HEALTHCHECKS['TAGS'] is invalid """
+        from . import validation
+
+        errors = validation.validate_tags('settings.HEALTHCHECKS["TAGS"]', _get_setting('TAGS'))
+        if errors:
+            raise HealthcheckError(errors[0])
+
+        started = time.time()
+        tag_set = _settings().tag_set()
+        payload = [healthcheck.serialize(tag_set) for healthcheck in healthchecks]
+
+        if self._instrumentation:
+            self._instrumentation.emit('serialize', time.time() - started, count=len(payload))
+
+        return payload
+
+    def _publish(self, payload, force=False, send=None):
+        """ PUT a serialized payload to the Cronitor API. Every way of publishing goes through here: put(), aput() and
+        the `healthchecks publish` command.
+        payload (list[dict]): Serialized healthchecks
+        force (bool): Skip the check for an unchanged payload
+        send (callable): Optional replacement for _send(), called with the definitions to publish and the API key
+        :return: tuple(PublishPlan|None, list[dict]) The plan, None when nothing was sent, and the definitions that were
+                 published """
+        plan = self._plan(payload, force)
+        if plan is None:
+            # Already published, or being published by another process. Either way it supersedes the outbox.
+            keys = [definition['key'] for definition in payload]
+            self._replay_outbox(keys, current=keys)
+            return None, []
+
+        published = (send or self._send)(plan.outgoing, plan.api_key)
+        self._complete(plan, published)
+        return plan, published
+
+    def _plan(self, payload, force=False):
+        """ Decide what, if anything, this process should publish. Checks the API key, skips unchanged payloads,
+        takes the cross-process publish lock and computes the definitions that changed.
+        :return: PublishPlan|None None when there is nothing for this process to publish """
+        if _settings().debug:
+            self._messages.append((
+                logging.INFO,
+                'DEV MODE: settings.DEBUG is True. Monitors will be created in Dev mode.'
+            ))
+
+        api_key = _get_setting('API_KEY')
+        if not api_key:
+            self._messages.append((
+                logging.ERROR,
+                'Missing Cronitor API key. Set settings.HEALTHCHECKS["API_KEY"] to publish healthchecks.'
+            ))
+            return None
+
+        store = self._store()
+        scope = _scope(api_key)
+        fingerprint = _fingerprint([scope, payload])
+        if not force and self._is_unchanged(store, scope, fingerprint):
+            self._messages.append((
+                logging.INFO,
+                'Healthchecks unchanged since they were last published, skipping. Use put(force=True) or set '
+                'settings.HEALTHCHECKS["FORCE_PUBLISH"] to publish anyway.'
+            ))
+            return None
+
+        if not self._circuit_allows(store):
+            # Keep what would have been published so it is replayed once Cronitor can be reached
+            changed, _ = _diff(payload, _manifest(payload), self._load_manifest(store, scope))
+            self._save_to_outbox(payload if force else changed, fingerprint)
+            return None
+
+        lock_key = self._acquire_publish_lock(store, fingerprint)
+        if lock_key is False:
+            if not force:
+                return None
+
+            # The lock may be left by a publish that has finished but not released it, e.g. one that crashed
+            self._messages.append((logging.DEBUG, 'Publishing anyway: force is set.'))
+            lock_key = None
+
+        manifest = _manifest(payload)
+        previous = self._load_manifest(store, scope)
+        changed, removed = _diff(payload, manifest, previous)
+        if removed:
+            self._messages.append((
+                logging.WARN,
+                'Healthchecks no longer defined and not updated: {}'.format(', '.join(removed))
+            ))
+
+        outgoing = payload if force else changed
+        if not outgoing:
+            self._messages.append((logging.INFO, 'No healthchecks changed since they were last published.'))
+
+        return PublishPlan(
+            api_key=api_key,
+            scope=scope,
+            store=store,
+            fingerprint=fingerprint,
+            lock_key=lock_key,
+            manifest=manifest,
+            previous=previous,
+            removed=removed,
+            outgoing=outgoing,
+        )
+
+    def _complete(self, plan, published):
+        """ Record the outcome of a publish
+        plan (PublishPlan): The plan that was published
+        published (list[dict]): Definitions that were published """
+        self._record_circuit(plan.store, plan.outgoing, published)
+        if len(published) == len(plan.outgoing):
+            self._remember_fingerprint(plan.store, plan.scope, plan.fingerprint)
+            self._remember_manifest(plan.store, plan.scope, plan.manifest)
+            if plan.lock_key:
+                # The fingerprint now stops other processes publishing this payload. Releasing the lock lets it be
+                # published again if the healthchecks change and then change back.
+                self._release_publish_lock(plan.store, plan.lock_key)
+
+            self._replay_outbox(plan.manifest, current=plan.manifest)
         else:
+            # Record the batches that did succeed so they are not sent again next time
+            self._remember_manifest(
+                plan.store,
+                plan.scope,
+                _merge_manifest(plan.previous, plan.manifest, published, plan.removed)
+            )
+            if plan.lock_key:
+                self._release_publish_lock(plan.store, plan.lock_key)
+
+            published_keys = set(definition['key'] for definition in published)
+            self._save_to_outbox(
+                [definition for definition in plan.outgoing if definition['key'] not in published_keys],
+                plan.fingerprint
+            )
+
+    def flush_outbox(self, superseded=(), current=None):
+        """ Replay the healthchecks saved to the outbox by publishes that failed. Only the newest definition of each
+        monitor is sent, and only if it has not been published since. Definitions that fail again go back in the
+        outbox.
+        superseded (iterable[str]): Keys published since the definitions were saved
+        current (iterable[str]): Every key of the payload just published in full. Other keys are dropped.
+        :return: int|None Number of definitions still in the outbox, or None if the outbox is disabled """
+        from . import outbox as outbox_module
+
+        outbox, api_key = self._outbox(), _get_setting('API_KEY')
+        if outbox is None or not api_key:
+            return None
+
+        store, scope = self._store(), _scope(api_key)
+        published_fingerprint = None
+        if store is not None:
             try:
-                payload = []
-                for healthcheck in healthchecks:
-                    try:
-                        payload.append(healthcheck.serialize())
-                    except AssertionError as e:
-                        self._messages.append((
-                            logging.ERROR,
-                            'Healthcheck can not be published. Validation error: {}'.format(e)
-                        ))
-
-                api_key = _get_setting('API_KEY')
-                if api_key:
-                    try:
-                        r = requests.put(ENDPOINT_URL, json=payload, auth=(api_key, ''), timeout=5)
-                        if r.status_code != requests.codes.ok:
-                            raise HealthcheckError(r.text)
-                    except Exception as e:
-                        self._messages.append((
-                            logging.ERROR,
-                            'Cronitor healthchecks could not be published. Request failure. Details:\n\n{}'.format(e)
-                        ))
-                else:
-                    self._messages.append((
-                        logging.ERROR,
-                        'Missing Cronitor API key. Set settings.HEALTHCHECKS["API_KEY"] to publish healthchecks.'
-                    ))
+                published_fingerprint = store.get(_store_key('fingerprint', scope))
+            except Exception as e:
+                self._messages.append((
+                    logging.WARN, 'Could not read last published fingerprint. Details: {}'.format(e)
+                ))
 
-                if settings.DEBUG:
-                    self._messages.append((
-                        logging.INFO,
-                        'DEV MODE: settings.DEBUG is True. Monitors will be created in Dev mode.'
-                    ))
+        entries, claims = outbox.claim()
+        pending = outbox_module.coalesce(entries, superseded, published_fingerprint, current)
+        outgoing = [definition for definition, _ in pending]
+        if outgoing and not self._circuit_allows(store):
+            # Keep everything for when Cronitor can be reached again
+            published = []
+        else:
+            published = self._send(outgoing, api_key)
+            self._record_circuit(store, outgoing, published)
+
+        published_keys = set(definition['key'] for definition in published)
+        failed = {}
+        for definition, fingerprint in pending:
+            if definition['key'] not in published_keys:
+                failed.setdefault(fingerprint, []).append(definition)
+
+        for fingerprint, definitions in failed.items():
+            outbox.append(definitions, fingerprint)
+
+        outbox.done(claims)
+        manifest = self._load_manifest(store, scope)
+        if published and manifest is not None:
+            manifest.update(_manifest(published))
+            self._remember_manifest(store, scope, manifest)
+
+        if pending:
+            self._messages.append((
+                logging.INFO,
+                'Replayed {} of {} healthchecks from the outbox.'.format(len(published), len(pending))
+            ))
+
+        return len(pending) - len(published)
+
+    def _send(self, payload, api_key):
+        """ Make the API requests. The payload is split into batches of settings.HEALTHCHECKS['BATCH_SIZE'] that are
+        uploaded concurrently over a shared connection pool. Each batch succeeds or fails independently, and all
+        retries finish within settings.HEALTHCHECKS['PUBLISH_DEADLINE'] seconds.
+        :return: list[dict] Definitions that were published """
+        if not payload:
+            return []
+
+        batches = _batches(payload, _get_setting('BATCH_SIZE'))
+        concurrency = max(1, min(_get_setting('PUBLISH_CONCURRENCY'), len(batches)))
+        session = self._get_session()
+        deadline = time.time() + _get_setting('PUBLISH_DEADLINE')
+        if concurrency == 1:
+            results = [
+                self._send_batch(session, api_key, deadline, batch, i, len(batches))
+                for i, batch in enumerate(batches, 1)
+            ]
+        else:
+            from multiprocessing.pool import ThreadPool
 
+            pool = ThreadPool(concurrency)
+            try:
+                results = pool.map(
+                    lambda args: self._send_batch(session, api_key, deadline, *args),
+                    [(batch, i, len(batches)) for i, batch in enumerate(batches, 1)]
+                )
+            finally:
+                pool.close()
+
+        return self._sent(payload, batches, results)
+
+    def _sent(self, payload, batches, results):
+        """ :return: list[dict] Definitions in the batches that were published """
+        if logging.getLogger(__name__).isEnabledFor(logging.DEBUG):
+            self._messages.append((
+                logging.DEBUG,
+                'PUT {}:\n{}\n\n'.format(ENDPOINT_URL, _dump(payload, _get_setting('DEBUG_PAYLOAD_LIMIT')))
+            ))
+        return [definition for batch, published in zip(batches, results) if published for definition in batch]
+
+    def _send_batch(self, session, api_key, deadline, batch, number, total):
+        """ PUT a single batch of definitions, retrying failed connections and 429 and 5xx responses with jittered
+        exponential backoff. A Retry-After header is honored. No retry is attempted if it would run past the deadline,
+        and the connect and read timeouts of each attempt are cut short so it cannot either.
+        :return: bool True if the batch was published """
+        from . import compression
+        import json
+        import random
+        import requests
+
+        label = 'healthchecks' if total == 1 else 'healthchecks batch {}/{} ({} monitors)'.format(
+            number, total, len(batch)
+        )
+        started = time.time()
+        codec, headers, sizes = _get_codec(), JSON_HEADERS, {}
+        threshold = _get_setting('STREAM_THRESHOLD')
+        if threshold and len(batch) >= threshold:
+            # Large batches are encoded while they are sent, once per attempt, instead of held in memory as one string
+            body = None
+            if self._instrumentation:
+                self._instrumentation.emit('encode', None, count=len(batch), streamed=True)
+        else:
+            body = json.dumps(batch).encode('utf-8')
+            sizes['raw'] = len(body)
+            if codec and len(body) < _get_setting('COMPRESSION_THRESHOLD'):
+                codec = None
+            elif codec:
+                body = codec.compress(body)
+                sizes['compressed'] = len(body)
+
+            if self._instrumentation:
+                self._instrumentation.emit(
+                    'encode', time.time() - started, bytes=sizes['raw'], compressed_bytes=sizes.get('compressed'),
+                    count=len(batch)
+                )
+
+        if codec:
+            headers = dict(JSON_HEADERS)
+            headers['Content-Encoding'] = codec.encoding
+
+        attempt = 0
+        while True:
+            retryable, retry_after = True, None
+            try:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    # Batches waiting for a free worker may only start once the deadline has passed
+                    raise HealthcheckError('Publish deadline passed before the request was sent.')
+
+                timeout = (
+                    min(_get_setting('CONNECT_TIMEOUT'), remaining),
+                    min(_get_setting('READ_TIMEOUT'), remaining)
+                )
+                request_started = time.time()
+                data = body
+                if body is None:
+                    data = _stream(batch)
+                    if codec:
+                        data = compression.compress_stream(data, codec, sizes)
+
+                r = session.put(ENDPOINT_URL, data=data, auth=(api_key, ''), headers=headers, timeout=timeout)
+                if self._instrumentation:
+                    self._instrumentation.emit(
+                        'http', time.time() - request_started, status=r.status_code, attempt=attempt + 1,
+                        batch=number, count=len(batch)
+                    )
+
+                if r.status_code == requests.codes.ok:
+                    break
+                if r.status_code not in RETRY_STATUS_CODES:
+                    raise HealthcheckError(r.text)
+
+                error = HealthcheckError('HTTP {}'.format(r.status_code))
+                retry_after = _retry_after(r)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception as e:
+                error, retryable = e, False
+
+            delay = retry_after if retry_after is not None else \
+                random.uniform(0, _get_setting('RETRY_BACKOFF') * 2 ** attempt)
+            if not retryable or attempt >= _get_setting('MAX_RETRIES') or time.time() + delay >= deadline:
                 self._messages.append((
-                    logging.DEBUG,
-                    'PUT {}:\n{}\n\n'.format(ENDPOINT_URL, json.dumps(payload, indent=2))
+                    logging.ERROR,
+                    'Cronitor {} could not be published. Request failure after {:.2f}s and {} attempt(s). '
+                    'Details:\n\n{}'.format(label, time.time() - started, attempt + 1, error)
                 ))
+                return False
+
+            time.sleep(delay)
+            attempt += 1
+
+        self._messages.append((
+            logging.DEBUG,
+            'Published {} in {:.2f}s'.format(label, time.time() - started)
+        ))
+        if codec:
+            self._messages.append((
+                logging.DEBUG,
+                'Compressed {} with {} from {} to {} bytes'.format(
+                    label, codec.encoding, sizes['raw'], sizes['compressed']
+                )
+            ))
+        return True
+
+    def _get_session(self):
+        """ The session is kept for the life of the client so keep-alive connections are reused. It is rebuilt after a
+        fork so worker processes never share sockets with their parent.
+        :return: requests.Session """
+        if self._session is None or self._session_pid != os.getpid():
+            from . import transport
+
+            session = transport.build_session(_get_setting('PUBLISH_CONCURRENCY'))
+            self._session, self._session_pid = session, os.getpid()
+
+        return self._session
+
+    def _is_unchanged(self, store, scope, fingerprint):
+        """ scope (str): Digest of the API key and endpoint, see _scope()
+        :return: bool True if this payload was the last one successfully published """
+        if store is None:
+            return False
 
-            except HealthcheckError as e:
-                self._messages.append((logging.ERROR, str(e)))
+        try:
+            return store.get(_store_key('fingerprint', scope)) == fingerprint
+        except Exception as e:
+            self._messages.append((logging.WARN, 'Could not read last published fingerprint. Details: {}'.format(e)))
+            return False
+
+    def _remember_fingerprint(self, store, scope, fingerprint):
+        if store is None:
+            return
+
+        try:
+            store.set(_store_key('fingerprint', scope), fingerprint)
+        except Exception as e:
+            self._messages.append((logging.WARN, 'Could not save published fingerprint. Details: {}'.format(e)))
+
+    def _load_manifest(self, store, scope):
+        """ Retrieve the {key: definition digest} manifest saved by the last successful publish with the same API key
+        and endpoint
+        :return: dict|None None when differential publishing is disabled or nothing has been published """
+        if store is None or not _get_setting('DIFF_PUBLISH'):
+            return None
+
+        try:
+            return store.get(_store_key('manifest', scope))
+        except Exception as e:
+            self._messages.append((logging.WARN, 'Could not read published manifest. Details: {}'.format(e)))
+            return None
+
+    def _remember_manifest(self, store, scope, manifest):
+        if store is None or not _get_setting('DIFF_PUBLISH'):
+            return
 
+        try:
+            store.set(_store_key('manifest', scope), manifest)
+        except Exception as e:
+            self._messages.append((logging.WARN, 'Could not save published manifest. Details: {}'.format(e)))
+
+    def _acquire_publish_lock(self, store, fingerprint):
+        """ When a store is configured, only the first of many processes starting with an identical payload will
+        publish it. The lock expires after settings.HEALTHCHECKS['PUBLISH_LOCK_TIMEOUT'] seconds so a crashed
+        publisher cannot block future deploys.
+        :return: str|None|bool The lock key, None if no store is configured, or False if another process holds it """
+        if store is None:
+            return None
+
+        try:
+            lock_key = 'lock-{}'.format(fingerprint)
+            if store.add(lock_key, os.getpid(), _get_setting('PUBLISH_LOCK_TIMEOUT')):
+                return lock_key
+        except Exception as e:
+            self._messages.append((
+                logging.WARN,
+                'Could not acquire healthchecks publish lock, publishing anyway. Details: {}'.format(e)
+            ))
+            return None
+
+        self._messages.append((
+            logging.DEBUG,
+            'Skipping publish: these healthchecks are being published by another process.'
+        ))
+        return False
+
+    def _release_publish_lock(self, store, lock_key):
+        try:
+            store.delete(lock_key)
+        except Exception as e:
+            self._messages.append((logging.WARN, 'Could not release healthchecks publish lock. Details: {}'.format(e)))
+
+    def _circuit_breaker(self, store):
+        """ :return: circuit.CircuitBreaker|None None without a store or when the circuit breaker is disabled """
+        threshold = _get_setting('CIRCUIT_BREAKER_THRESHOLD')
+        if store is None or not threshold:
+            return None
+
+        from .circuit import CircuitBreaker
+        return CircuitBreaker(store, threshold, _get_setting('CIRCUIT_BREAKER_COOLDOWN'))
+
+    def _circuit_allows(self, store):
+        """ :return: bool False while the circuit breaker is open, or half-open and probed by another process """
+        breaker = self._circuit_breaker(store)
+        if breaker is None:
+            return True
+
+        try:
+            if breaker.allow():
+                return True
+
+            opened_at = breaker.opened_at()
+        except Exception as e:
+            self._messages.append((
+                logging.WARN,
+                'Could not read healthchecks circuit breaker state, publishing anyway. Details: {}'.format(e)
+            ))
+            return True
+
+        if opened_at is None:
+            self._messages.append((
+                logging.DEBUG,
+                'Skipping publish: another process is checking whether Cronitor can be reached.'
+            ))
+        else:
+            self._messages.append((
+                logging.WARN,
+                'Skipping publish: Cronitor could not be reached by the last {} publishes. Publishing resumes in '
+                '{:.0f}s.'.format(breaker.threshold, max(0, opened_at + breaker.cooldown - time.time()))
+            ))
+        return False
+
+    def _circuit_closed(self, store):
+        """ :return: bool False if recent publishes could not reach Cronitor """
+        breaker = self._circuit_breaker(store)
+        try:
+            return breaker is None or breaker.is_closed()
+        except Exception:
+            return True
+
+    def _record_circuit(self, store, outgoing, published):
+        """ Count a publish that sent definitions but reached Cronitor with none of them as a failure """
+        breaker = self._circuit_breaker(store)
+        if breaker is None or not outgoing:
+            return
+
+        try:
+            if published:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+        except Exception as e:
+            self._messages.append((
+                logging.WARN,
+                'Could not save healthchecks circuit breaker state. Details: {}'.format(e)
+            ))
+
+    def _store(self):
+        """ :return: backends.BaseStore|None """
+        from . import backends
+
+        return backends.get_store(
+            _get_setting('STORE'),
+            directory=_get_setting('STORE_DIR'),
+            cache_alias=_get_setting('STORE_CACHE_ALIAS')
+        )
+
+    def _outbox(self):
+        """ :return: outbox.Outbox|None None when settings.HEALTHCHECKS['OUTBOX'] is disabled """
+        if not _get_setting('OUTBOX'):
+            return None
+
+        from .outbox import Outbox
+        return Outbox(_get_setting('OUTBOX_DIR'), stale_after=_get_setting('PUBLISH_LOCK_TIMEOUT'))
+
+    def _save_to_outbox(self, definitions, fingerprint):
+        """ Keep definitions that could not be published so they are replayed later """
+        outbox = self._outbox()
+        if outbox is None or not definitions:
+            return
+
+        try:
+            if fingerprint is not None and outbox.newest_fingerprint() == fingerprint:
+                # Every worker starting during an outage would otherwise append the same payload
+                self._messages.append((logging.DEBUG, 'Healthchecks already saved to the outbox.'))
+                return
+
+            outbox.append(definitions, fingerprint)
+        except (IOError, OSError) as e:
+            self._messages.append((logging.ERROR, 'Could not save healthchecks to the outbox. Details: {}'.format(e)))
+            return
+
+        self._messages.append((
+            logging.WARN,
+            'Saved {} healthchecks to the outbox at {}. They will be published once Cronitor can be reached.'.format(
+                len(definitions), outbox.path
+            )
+        ))
+        self._schedule_outbox_flush()
+
+    def _replay_outbox(self, superseded, current=None):
+        """ Replay the outbox, if anything is waiting in it, after a publish succeeded """
+        outbox = self._outbox()
+        if outbox is None or not self._circuit_closed(self._store()):
+            return
+
+        try:
+            if outbox.pending():
+                self.flush_outbox(superseded, current)
+        except (IOError, OSError) as e:
+            self._messages.append((logging.ERROR, 'Could not replay the healthchecks outbox. Details: {}'.format(e)))
+
+    def _schedule_outbox_flush(self):
+        """ Start a daemon thread that replays the outbox after settings.HEALTHCHECKS['OUTBOX_RETRY_DELAY'] seconds,
+        doubling the delay after every attempt that leaves definitions behind. Anything still pending when the process
+        exits is replayed by the next publish. """
+        delay = _get_setting('OUTBOX_RETRY_DELAY')
+        if delay is None or (self._outbox_thread is not None and self._outbox_thread.is_alive()):
+            return
+
+        thread = threading.Thread(target=self._flush_outbox_with_backoff, args=(delay,), name='healthchecks-outbox')
+        thread.daemon = True
+        self._outbox_thread = thread
+        thread.start()
+
+    def _flush_outbox_with_backoff(self, delay):
+        while True:
+            time.sleep(delay)
+            try:
+                pending = self.flush_outbox()
+            except (IOError, OSError) as e:
+                self._messages.append((
+                    logging.ERROR, 'Could not replay the healthchecks outbox. Details: {}'.format(e)
+                ))
+                pending = None
+
+            self._flush_messages_to_log()
+            if not pending:
+                return
+
+            delay = min(max(delay, 1) * 2, OUTBOX_MAX_DELAY)
+
+    def _publish_in_background(self, payload, force=False):
+        """ Hand the PUT request to a daemon thread so app startup is not blocked on the Cronitor API. Pending
+        threads are joined, with a timeout, when the interpreter exits so short-lived processes still publish. """
+        if not self._join_registered:
+            import atexit
+
+            atexit.register(self.join)
+            self._join_registered = True
+
+        thread = threading.Thread(target=self._publish_and_flush, args=(payload, force), name='healthchecks-publisher')
+        thread.daemon = True
+        self._threads.append(thread)
+        thread.start()
+
+    def _publish_and_flush(self, payload, force=False):
+        self._publish(payload, force)
         self._flush_messages_to_log()
 
+    def _publish_mode(self):
+        mode = _get_setting('PUBLISH_MODE')
+        if mode not in PUBLISH_MODES:
+            raise HealthcheckError(
+                'settings.HEALTHCHECKS["PUBLISH_MODE"] must be one of {}'.format(', '.join(PUBLISH_MODES))
+            )
+
+        return mode
+
     def _flush_messages_to_log(self):
         """ Write messages to the `django_auto_healthchecks.healthchecks` logger """
         logging.basicConfig()
         logger = logging.getLogger(__name__)
-        [logger.log(msg[0], msg[1]) for msg in self._messages]
-        self._messages = []
+        messages, self._messages = self._messages, []
+        [logger.log(msg[0], msg[1]) for msg in messages]
 
 
 def url(regex, view, healthcheck=None, **kwargs):
@@ -369,24 +1306,233 @@ def url(regex, view, healthcheck=None, **kwargs):
     healthcheck (Healthcheck): Define your healthcheck with a `Healthcheck()` instance.
     :return RegexURLPattern
     """
+    return _attach(django_url(regex, view, **kwargs), view, healthcheck, kwargs.get('name'))
+
+
+def path(route, view, healthcheck=None, **kwargs):
+    """ Drop-in replacement for django.urls.path, see url(). Requires Django 2.0 or later.
+    route (str): Route, e.g. 'articles/<int:year>/', passed to `django.urls.path()`
+    view (mixed): Attached view for this route, or an include(), passed to `django.urls.path()`
+    healthcheck (Healthcheck): Define your healthcheck with a `Healthcheck()` instance.
+    :return URLPattern
+    """
+    if django_path is None:
+        raise HealthcheckError('path() requires Django 2.0 or later, use re_path() or url() instead')
+
+    return _attach(django_path(route, view, **kwargs), view, healthcheck, kwargs.get('name'))
+
+
+def re_path(regex, view, healthcheck=None, **kwargs):
+    """ Drop-in replacement for django.urls.re_path, see url().
+    regex (str): Route regex, passed to `django.urls.re_path()`
+    view (mixed): Attached view for this route, or an include(), passed to `django.urls.re_path()`
+    healthcheck (Healthcheck): Define your healthcheck with a `Healthcheck()` instance.
+    :return URLPattern
+    """
+    return _attach(django_re_path(regex, view, **kwargs), view, healthcheck, kwargs.get('name'))
+
+
+def populate():
+    """ Enqueue the healthchecks attached to URL patterns by url(), path() or re_path(), found by walking the project's
+    URLconf. """
+    for healthcheck in discovery.discover():
+        Client.enqueue(healthcheck)
 
+
+def put(healthchecks=(), force=False):
+    """ Batch create-or-update health checks with supplied list of Healthcheck instances. Invoke from your deploy
+    script, or add healthchecks for third-party apps without having to hack their code.
+    :param healthchecks: list[Healthcheck] of Healthcheck objects These healthchecks will be merged with any defined in
+           urls.py file(s). See https://cronitor.io/docs/django-health-checks for details.
+    :param force: Publish even if these healthchecks are unchanged since they were last published. """
+    populate()
+    Client.put(healthchecks, force=force)
+    if _get_setting('RELEASE_AFTER_PUBLISH'):
+        release()
+
+
+def release():
+    """ Detach healthchecks from URL patterns and clear the client so they can be garbage collected, instead of being
+    held for the life of the process once published. Called by put() when settings.HEALTHCHECKS['RELEASE_AFTER_PUBLISH']
+    is True. """
+    discovery.detach()
+    Client.release()
+
+
+def _attach(pattern, view, healthcheck, name):
+    """ Attach a healthcheck to the URL pattern it monitors. It is enqueued by populate(), which qualifies the route
+    name with the namespaces of any include() the pattern is found under.
+    :return: The pattern """
     if isinstance(healthcheck, Healthcheck):
         if isinstance(view, (list, tuple)):
-            if settings.DEBUG:
+            if _settings().debug:
                 raise HealthcheckError('Healthchecks must be defined on individual routes')
         else:
-            healthcheck.route = kwargs.get('name')
-            Client.enqueue(healthcheck)
+            healthcheck.route = name
+            setattr(pattern, discovery.PATTERN_ATTRIBUTE, healthcheck)
 
-    return django_url(regex, view, **kwargs)
+    return pattern
 
 
-def put(healthchecks=()):
-    """ Batch create-or-update health checks with supplied list of Healthcheck instances. Invoke from your deploy
-    script, or add healthchecks for third-party apps without having to hack their code.
-    :param healthchecks: list[Healthcheck] of Healthcheck objects These healthchecks will be merged with any defined in
-           urls.py file(s). See https://cronitor.io/docs/django-health-checks for details. """
-    Client.put(healthchecks)
+def _definitions_enabled():
+    """ :return: bool False when this process should not build healthcheck definitions """
+    return bool(_get_setting('DEFINITIONS')) or _running_command()
+
+
+def _running_command():
+    """ The command line is checked as well as the flag set by the command, because `manage.py healthchecks` imports
+    urls.py, for system checks, before the command starts.
+    :return: bool True when this process is running the `healthchecks` management command """
+    return _command_running or sys.argv[1:2] == ['healthchecks']
+
+
+def _get_instrumentation():
+    """ :return: Instrumentation|None None when settings.HEALTHCHECKS['INSTRUMENTATION'] is disabled """
+    if not _get_setting('INSTRUMENTATION'):
+        return None
+
+    callback = _get_setting('INSTRUMENTATION_CALLBACK')
+    if isinstance(callback, string_types):
+        from django.utils.module_loading import import_string
+        callback = import_string(callback)
+
+    from .instrumentation import Instrumentation
+    return Instrumentation(callback)
+
+
+def _get_codec():
+    """ :return: compression.BaseCodec|None None when settings.HEALTHCHECKS['COMPRESSION'] is disabled """
+    from . import compression
+    return compression.get_codec(_get_setting('COMPRESSION'))
+
+
+def _get_scheme():
+    return 'https://' if _get_setting('HTTPS') else 'http://'
+
+
+def _fingerprint(payload):
+    """ Stable digest of a serialized payload, independent of dict ordering
+    :return: str """
+    import hashlib
+    import json
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=sorted)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def _scope(api_key):
+    """ Digest of the API key and endpoint healthchecks are published with. The same payload published to another
+    account or endpoint is a different publish, and must not share a fingerprint or manifest. The key is hashed so it
+    is never written to the store.
+    :return: str """
+    return _fingerprint([ENDPOINT_URL, api_key])
+
+
+def _store_key(name, scope):
+    """ :return: str Key of a value kept in the store for one API key and endpoint """
+    return '{}-{}'.format(name, scope)
+
+
+def _manifest(payload):
+    """ Map each monitor key in a serialized payload to a digest of its definition
+    :return: dict """
+    return dict((definition['key'], _fingerprint(definition)) for definition in payload)
+
+
+def _diff(payload, manifest, previous):
+    """ Compare a payload against the manifest of the last published payload.
+    payload (list[dict]): Serialized healthchecks
+    manifest (dict): Manifest of `payload`
+    previous (dict|None): Manifest of the last published payload. When None every definition is considered changed.
+    :return: tuple(list[dict], list[str]) Added or changed definitions, and the sorted keys that were removed """
+    if previous is None:
+        return payload, []
+
+    changed = [definition for definition in payload if previous.get(definition['key']) != manifest[definition['key']]]
+    removed = sorted(key for key in previous if key not in manifest)
+    return changed, removed
+
+
+def _merge_manifest(previous, manifest, published, removed):
+    """ Build the manifest to save after a partially successful publish
+    previous (dict|None): Manifest of the last published payload
+    manifest (dict): Manifest of the complete payload
+    published (list[dict]): Definitions that were published
+    removed (list[str]): Keys no longer defined
+    :return: dict """
+    merged = dict(previous or {})
+    for key in removed:
+        merged.pop(key, None)
+
+    for definition in published:
+        merged[definition['key']] = manifest[definition['key']]
+
+    return merged
+
+
+def _stream(payload, chunk_size=STREAM_CHUNK_SIZE):
+    """ Encode a payload as a JSON array one definition at a time, for use as a chunked request body
+    payload (list[dict]): Serialized healthchecks
+    chunk_size (int): Approximate size of each chunk, in bytes
+    :return: generator of bytes """
+    import json
+
+    encode = json.JSONEncoder().encode
+    buffered, size = ['['], 1
+    for i, definition in enumerate(payload):
+        encoded = encode(definition)
+        buffered.append(',' + encoded if i else encoded)
+        size += len(encoded) + 1
+        if size >= chunk_size:
+            yield ''.join(buffered).encode('utf-8')
+            buffered, size = [], 0
+
+    buffered.append(']')
+    yield ''.join(buffered).encode('utf-8')
+
+
+def _dump(payload, limit=None):
+    """ Pretty-print a payload for the debug log. The dump is built incrementally and stops once it is truncated.
+    limit (int): Optional maximum length, in characters
+    :return: str """
+    import json
+
+    if not limit:
+        return json.dumps(payload, indent=2)
+
+    parts, size = [], 0
+    for part in json.JSONEncoder(indent=2).iterencode(payload):
+        parts.append(part)
+        size += len(part)
+        if size > limit:
+            return '{}\n... truncated to {} characters'.format(''.join(parts)[:limit], limit)
+
+    return ''.join(parts)
+
+
+def _retry_after(response):
+    """ Parse the Retry-After header of a response
+    :return: float|None Seconds to wait """
+    value = getattr(response, 'headers', {}).get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        import email.utils
+
+        parsed = email.utils.parsedate_tz(value)
+        return max(0.0, email.utils.mktime_tz(parsed) - time.time()) if parsed else None
+
+
+def _batches(payload, size):
+    """ Split a payload into lists of at most `size` definitions. The payload is not split when size is falsy.
+    :return: list[list[dict]] """
+    if not size:
+        return [payload]
+
+    return [payload[i:i + size] for i in range(0, len(payload), size)]
 
 
 def _get_setting(key):
@@ -394,13 +1540,31 @@ def _get_setting(key):
     If it's not there, look for default in DEFAULTS
     :param key: Name of setting
     :return: * """
-    if hasattr(settings, 'HEALTHCHECKS') and key in settings.HEALTHCHECKS:
-        return settings.HEALTHCHECKS[key]
+    return _settings().get(key)
+
+
+_snapshot = None
+""" :type SettingsSnapshot Settings read by this module, see _settings() """
+
+
+def _settings():
+    """ The settings snapshot is rebuilt after it is invalidated, or when the settings object itself is replaced
+    :return: SettingsSnapshot """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is None or snapshot.source is not settings:
+        snapshot = _snapshot = SettingsSnapshot(settings)
+
+    return snapshot
+
+
+def _invalidate_settings(**kwargs):
+    """ Drop the settings snapshot. Connected to Django's `setting_changed` signal. """
+    global _snapshot
+    _snapshot = None
 
-    if key in DEFAULTS:
-        return DEFAULTS[key]
 
-    raise HealthcheckError('Error: Could not find setting key {}'.format(key))
+setting_changed.connect(_invalidate_settings, dispatch_uid='django_auto_healthchecks.settings')
 
 
 Client = IdempotentHealthcheckClient()
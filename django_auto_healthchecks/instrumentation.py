@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from . import signals
+import logging
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('enqueue', 'drain', 'serialize', 'encode', 'http')
+
+
+class Instrumentation(object):
+    """
+    Emit timings for each phase of the publish pipeline. Every measurement is written as a structured log record to the
+    `django_auto_healthchecks.instrumentation` logger, sent as the `signals.phase_timed` Django signal and passed to an
+    optional callback, so it can be forwarded to StatsD, Prometheus, etc.
+
+    Phases:
+        enqueue: Number of healthchecks queued by `url()` and `put()` (no duration)
+        drain: Resolving queued healthchecks into URLs
+        serialize: Building the API payload
+        encode: JSON encoding of each request body, with its size in bytes
+        http: Each request to the Cronitor API, with its status code and attempt number
+    """
+
+    def __init__(self, callback=None):
+        """ callback (callable): Optional `callback(phase, duration, details)` """
+        self.callback = callback
+
+    def emit(self, phase, duration, **details):
+        """ Record a measurement
+        phase (str): One of PHASES
+        duration (float|None): Seconds taken
+        details: Additional measurements, e.g. count or bytes """
+        logger.info(
+            '%s %s %s',
+            phase,
+            '{:.4f}s'.format(duration) if duration is not None else '-',
+            ' '.join('{}={}'.format(k, v) for k, v in sorted(details.items())),
+            extra={'phase': phase, 'duration': duration, 'details': details}
+        )
+        signals.phase_timed.send(sender=self.__class__, phase=phase, duration=duration, details=details)
+        if self.callback:
+            try:
+                self.callback(phase, duration, details)
+            except Exception as e:
+                logger.warning('Healthchecks instrumentation callback failed: %s', e)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from django.core.management.base import BaseCommand, CommandError
+from django_auto_healthchecks import healthchecks, runner
+import json
+import time
+
+ACTIONS = ('publish', 'diff', 'dry-run', 'export', 'probe', 'flush-outbox')
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish, diff, preview or export the healthchecks defined in your urls.py, or probe their URLs. '
+        'Set settings.HEALTHCHECKS["AUTO_PUBLISH"] to False to publish from a single deploy step with '
+        '`healthchecks publish` instead of from every process at startup.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=ACTIONS, help='publish: PUT healthchecks to Cronitor. '
+                                                            'diff: compare with what was last published. '
+                                                            'dry-run: print the payload without publishing. '
+                                                            'export: write the payload to a file. '
+                                                            'probe: request every healthcheck URL. '
+                                                            'flush-outbox: replay healthchecks that could not be '
+                                                            'published.')
+        parser.add_argument('--force', action='store_true', help='publish: publish even if nothing changed')
+        parser.add_argument('--output', '-o', help='export: file to write, defaults to stdout')
+        parser.add_argument('--host', help='probe: host[:port] to send requests to instead of the configured hostname')
+        parser.add_argument('--scheme', choices=('http', 'https'), help='probe: scheme to use for requests')
+        parser.add_argument('--concurrency', type=int, default=4, help='probe: number of simultaneous requests')
+
+    def handle(self, *args, **options):
+        client = healthchecks.Client
+
+        # Build definitions even when settings.HEALTHCHECKS['DEFINITIONS'] is False, e.g. under call_command()
+        healthchecks._command_running = True
+        try:
+            handler = getattr(self, 'handle_' + options['action'].replace('-', '_'))
+            handler(client, **options)
+        finally:
+            healthchecks._command_running = False
+            client._flush_messages_to_log()
+
+    def handle_publish(self, client, force=False, **options):
+        if not healthchecks._get_setting('API_KEY'):
+            raise CommandError(
+                'Missing Cronitor API key. Set settings.HEALTHCHECKS["API_KEY"] to publish healthchecks.'
+            )
+
+        payload, _ = self._serialize(client)
+        plan, published = client._publish(payload, force or healthchecks._get_setting('FORCE_PUBLISH'))
+        if plan is None:
+            self.stdout.write('Nothing published.')
+            return
+
+        self.stdout.write('Published {} of {} healthchecks.'.format(len(published), len(plan.outgoing)))
+        if len(published) != len(plan.outgoing):
+            raise CommandError('Some healthchecks could not be published.')
+
+    def handle_diff(self, client, **options):
+        store, api_key = client._store(), healthchecks._get_setting('API_KEY')
+        if store is None or not healthchecks._get_setting('DIFF_PUBLISH') or not api_key:
+            # Without DIFF_PUBLISH no manifest is saved, and manifests are kept per API key. Otherwise every
+            # healthcheck would be listed as added.
+            raise CommandError(
+                'Set settings.HEALTHCHECKS["STORE"], ["DIFF_PUBLISH"] and ["API_KEY"] to compare with the last '
+                'published healthchecks.'
+            )
+
+        payload, _ = self._serialize(client)
+        manifest = healthchecks._manifest(payload)
+        previous = client._load_manifest(store, healthchecks._scope(api_key)) or {}
+        changed, removed = healthchecks._diff(payload, manifest, previous)
+        for definition in changed:
+            self.stdout.write('{} {} {}'.format(
+                '~' if definition['key'] in previous else '+',
+                definition['key'],
+                definition.get('name') or definition['defaultName']
+            ))
+        for key in removed:
+            self.stdout.write('- {}'.format(key))
+
+        self.stdout.write('{} added, {} changed, {} removed, {} unchanged.'.format(
+            len([d for d in changed if d['key'] not in previous]),
+            len([d for d in changed if d['key'] in previous]),
+            len(removed),
+            len(payload) - len(changed)
+        ))
+
+    def handle_dry_run(self, client, **options):
+        payload, stats = self._serialize(client)
+        self.stdout.write(self._encode(payload, stats, indent=2))
+        self._write_stats(stats)
+
+    def handle_export(self, client, output=None, **options):
+        payload, stats = self._serialize(client)
+        encoded = self._encode(payload, stats)
+        if output:
+            with open(output, 'w') as f:
+                f.write(encoded)
+        else:
+            self.stdout.write(encoded)
+
+        self._write_stats(stats)
+
+    def handle_probe(self, client, host=None, scheme=None, concurrency=4, **options):
+        healthchecks.populate()
+        summary = runner.LiveRunner(concurrency, host=host, scheme=scheme).run(client.drain())
+        self.stdout.write(str(summary))
+        if summary.failed:
+            raise CommandError('{} healthchecks failed.'.format(len(summary.failed)))
+
+    def handle_flush_outbox(self, client, **options):
+        try:
+            pending = client.flush_outbox()
+        except (IOError, OSError) as e:
+            raise CommandError('Could not replay the healthchecks outbox. Details: {}'.format(e))
+
+        if pending is None:
+            raise CommandError('Set settings.HEALTHCHECKS["OUTBOX"] and ["API_KEY"] to replay the outbox.')
+
+        self.stdout.write('{} healthchecks left in the outbox.'.format(pending))
+        if pending:
+            raise CommandError('Some healthchecks could not be published.')
+
+    @staticmethod
+    def _serialize(client):
+        """ :return: tuple(list[dict], dict) The payload and how long it took to build """
+        healthchecks.populate()
+        started = time.time()
+        drained = client.drain()
+        drained_at = time.time()
+        if not drained:
+            if not healthchecks._get_setting('DEFINITIONS'):
+                raise CommandError(
+                    'No health checks defined. settings.HEALTHCHECKS["DEFINITIONS"] is False and urls.py was imported '
+                    'before the command started.'
+                )
+
+            raise CommandError('No health checks defined. See {} to get started.'.format(healthchecks.DOCS_URL))
+
+        try:
+            payload = client._serialize(drained)
+        except healthchecks.HealthcheckError as e:
+            raise CommandError(str(e))
+
+        stats = {
+            'healthchecks': len(payload),
+            'drain_seconds': drained_at - started,
+            'serialize_seconds': time.time() - drained_at,
+        }
+        return payload, stats
+
+    @staticmethod
+    def _encode(payload, stats, indent=None):
+        started = time.time()
+        encoded = json.dumps(payload, indent=indent, sort_keys=True, default=sorted)
+        stats['encode_seconds'] = time.time() - started
+        stats['bytes'] = len(encoded.encode('utf-8'))
+        return encoded
+
+    def _write_stats(self, stats):
+        self.stderr.write(
+            '{healthchecks} healthchecks, {bytes} bytes. drain {drain_seconds:.3f}s, '
+            'serialize {serialize_seconds:.3f}s, encode {encode_seconds:.3f}s'.format(**stats)
+        )
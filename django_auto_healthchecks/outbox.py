@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from collections import OrderedDict
+import errno
+import json
+import os
+import time
+from .backends import default_directory, ensure_directory, ensure_private_directory
+
+FILENAME = 'outbox.jsonl'
+
+CLAIMED_SUFFIX = '.claimed'
+
+
+class Outbox(object):
+    """ Append-only file of healthcheck definitions that could not be published, kept so they can be replayed once
+    the Cronitor API is reachable. Each line is a JSON entry holding the definitions and the fingerprint of the
+    payload they were part of. Any number of processes may append; flushers claim the file by renaming it, so an
+    entry is only ever replayed by one of them. """
+
+    def __init__(self, directory=None, stale_after=300):
+        """ directory (str): Where the outbox file is kept. Defaults to backends.default_directory().
+        stale_after (int): Seconds after which entries claimed by a flusher that never finished may be claimed again """
+        self.directory = directory or default_directory()
+        self.private = directory is None
+        self.path = os.path.join(self.directory, FILENAME)
+        self.stale_after = stale_after
+
+    def append(self, definitions, fingerprint=None):
+        """ Durably record definitions that could not be published
+        definitions (list[dict]): Serialized healthchecks
+        fingerprint (str): Fingerprint of the payload the definitions were part of """
+        if not definitions:
+            return
+
+        ensure_directory(self.directory, self.private)
+        line = json.dumps({'time': time.time(), 'fingerprint': fingerprint, 'definitions': definitions},
+                          separators=(',', ':'), default=sorted) + '\n'
+
+        # A single write() to a file opened with O_APPEND is not interleaved with writes from other processes
+        # Definitions may hold credentials in their headers and cookies
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            os.write(fd, line.encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def newest_fingerprint(self):
+        """ :return: str|None Fingerprint of the last entry appended and not yet claimed """
+        if self.private:
+            ensure_private_directory(self.directory)
+
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                # Entries are single lines: read back until the start of the last complete one
+                chunk, block = b'', 4096
+                while size > 0 and chunk.count(b'\n') < 2:
+                    step = min(block, size)
+                    size -= step
+                    f.seek(size)
+                    chunk = f.read(step) + chunk
+        except (IOError, OSError):
+            return None
+
+        lines = [line for line in chunk.split(b'\n') if line.strip()]
+        try:
+            return json.loads(lines[-1].decode('utf-8')).get('fingerprint') if lines else None
+        except ValueError:
+            return None
+
+    def pending(self):
+        """ :return: bool True if there are entries waiting to be replayed """
+        if self.private:
+            ensure_private_directory(self.directory)
+
+        return os.path.exists(self.path) or bool(self._stale_claims())
+
+    def claim(self):
+        """ Take every pending entry, along with entries claimed by flushers that never finished. Call done() once
+        they are replayed, or re-appended.
+        :return: tuple(list[dict], list[str]) Entries, oldest first, and the claimed files to pass to done() """
+        if self.private:
+            ensure_private_directory(self.directory)
+
+        claims = []
+        for path in [self.path] + self._stale_claims():
+            claimed = '{}.{}.{}.{}{}'.format(
+                self.path, os.getpid(), int(time.time() * 1e6), len(claims), CLAIMED_SUFFIX
+            )
+            try:
+                os.rename(path, claimed)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+
+                # Another flusher claimed it first
+                continue
+
+            # The claim is stale `stale_after` seconds from now, not from the last append
+            os.utime(claimed, None)
+            claims.append(claimed)
+
+        entries = []
+        for claimed in claims:
+            entries.extend(self._read(claimed))
+
+        entries.sort(key=lambda entry: entry.get('time') or 0)
+        return entries, claims
+
+    def done(self, claims):
+        """ Delete claimed files once their entries are replayed """
+        for claimed in claims:
+            try:
+                os.remove(claimed)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+
+    def _stale_claims(self):
+        """ :return: list[str] Files claimed more than `stale_after` seconds ago """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+
+        cutoff = time.time() - self.stale_after
+        stale = []
+        for name in names:
+            if name.startswith(FILENAME + '.') and name.endswith(CLAIMED_SUFFIX):
+                claimed = os.path.join(self.directory, name)
+                try:
+                    if os.path.getmtime(claimed) < cutoff:
+                        stale.append(claimed)
+                except OSError:
+                    pass
+
+        return stale
+
+    @staticmethod
+    def _read(path):
+        """ :return: list[dict] Entries in a file. A line left incomplete by a crash is skipped. """
+        entries = []
+        try:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except (IOError, OSError):
+            pass
+
+        return entries
+
+
+def coalesce(entries, superseded=(), published_fingerprint=None, current=None):
+    """ Reduce outbox entries to the newest definition per monitor key
+    entries (list[dict]): Outbox entries, oldest first
+    superseded (iterable[str]): Keys published since, whose outbox definitions are out of date
+    published_fingerprint (str): Fingerprint of the last payload published in full. Entries from it are dropped.
+    current (iterable[str]): Every key of the last payload published in full, if known. Definitions of other keys
+                             belong to monitors removed since, and are dropped.
+    :return: list[tuple(dict, str)] Definitions to replay, each with the fingerprint of the payload it was part of """
+    superseded = set(superseded)
+    current = set(current) if current is not None else None
+    latest = OrderedDict()
+    for entry in entries:
+        if published_fingerprint and entry.get('fingerprint') == published_fingerprint:
+            continue
+
+        for definition in entry.get('definitions') or ():
+            key = definition.get('key')
+            if key and key not in superseded and (current is None or key in current):
+                latest.pop(key, None)
+                latest[key] = (definition, entry.get('fingerprint'))
+
+    return list(latest.values())
@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from future.utils import python_2_unicode_compatible
+from multiprocessing.pool import ThreadPool
+try:
+    from urllib.parse import urlsplit, urlunsplit
+except ImportError:  # Python 2
+    from urlparse import urlsplit, urlunsplit
+from . import healthchecks as _healthchecks
+import math
+import time
+
+OPERATORS = {
+    'eq': lambda actual, expected: actual == expected,
+    'neq': lambda actual, expected: actual != expected,
+    'lt': lambda actual, expected: actual < expected,
+    'gt': lambda actual, expected: actual > expected,
+    'contains': lambda actual, expected: expected in actual,
+    'not_contains': lambda actual, expected: expected not in actual,
+}
+
+OPERATOR_ALIASES = {
+    '=': 'eq', '==': 'eq', 'equals': 'eq', 'is': 'eq',
+    '!=': 'neq', 'not_equals': 'neq', 'is_not': 'neq',
+    '<': 'lt', 'less_than': 'lt',
+    '>': 'gt', 'greater_than': 'gt',
+    'does_not_contain': 'not_contains',
+}
+
+
+@python_2_unicode_compatible
+class CheckResult(object):
+    """ Outcome of running a single healthcheck """
+
+    def __init__(self, healthcheck, status=None, duration=None, failures=None, error=None):
+        """ healthcheck (Healthcheck): The resolved healthcheck that was run
+        status (int): Response status code
+        duration (float): Seconds taken to respond
+        failures (list[str]): Assertions that did not hold
+        error (str): Why the request could not be made """
+        self.healthcheck = healthcheck
+        self.status = status
+        self.duration = duration
+        self.failures = failures or []
+        self.error = error
+
+    @property
+    def passed(self):
+        return not self.error and not self.failures
+
+    def __str__(self):
+        outcome = 'PASS' if self.passed else 'FAIL'
+        detail = self.error or '; '.join(self.failures)
+        timing = '{:.0f}ms'.format(self.duration * 1000) if self.duration is not None else '-'
+        return '{} {} [{} {}]{}'.format(
+            outcome, self.healthcheck.display_name(), self.status or '-', timing, ' ' + detail if detail else ''
+        )
+
+
+@python_2_unicode_compatible
+class RunSummary(object):
+    """ Results of running a set of healthchecks, with latency percentiles """
+
+    def __init__(self, results, duration):
+        """ results (list[CheckResult]): One result per healthcheck
+        duration (float): Wall clock seconds taken to run every healthcheck """
+        self.results = results
+        self.duration = duration
+        latencies = sorted(r.duration for r in results if r.duration is not None)
+        self.percentiles = dict(('p{}'.format(p), percentile(latencies, p)) for p in (50, 95, 99))
+
+    @property
+    def passed(self):
+        return [r for r in self.results if r.passed]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.passed]
+
+    def __str__(self):
+        lines = [str(r) for r in self.failed]
+        lines.append('{} passed, {} failed in {:.2f}s. Latency {}'.format(
+            len(self.passed), len(self.failed), self.duration, ' '.join(
+                '{}={}'.format(p, '{:.0f}ms'.format(v * 1000) if v is not None else '-')
+                for p, v in sorted(self.percentiles.items(), key=lambda item: int(item[0][1:]))
+            )
+        ))
+        return '\n'.join(lines)
+
+
+class LocalRunner(object):
+    """
+    Run healthchecks in-process through Django's test client, without a network round trip, and evaluate their
+    assertions locally. Use it as a smoke test before a deploy goes live.
+    """
+
+    def __init__(self, concurrency=4):
+        """ concurrency (int): Number of healthchecks run at the same time """
+        self.concurrency = max(1, concurrency)
+
+    def run(self, healthchecks):
+        """ Run resolved healthchecks, e.g. those returned by `IdempotentHealthcheckClient.drain()`
+        healthchecks (list[Healthcheck]): Resolved healthchecks
+        :return: RunSummary """
+        healthchecks = list(healthchecks)
+        started = time.time()
+        if self.concurrency == 1 or len(healthchecks) < 2:
+            results = [self._run_one(healthcheck) for healthcheck in healthchecks]
+        else:
+            pool = ThreadPool(min(self.concurrency, len(healthchecks)))
+            try:
+                results = pool.map(self._run_one, healthchecks)
+            finally:
+                pool.close()
+
+        return RunSummary(results, time.time() - started)
+
+    def _run_one(self, healthcheck):
+        try:
+            status, body, duration = self.request(healthcheck)
+        except Exception as e:
+            return CheckResult(healthcheck, error='{}: {}'.format(type(e).__name__, e))
+
+        return CheckResult(healthcheck, status, duration, evaluate(healthcheck.assertions, status, body, duration))
+
+    def request(self, healthcheck):
+        """ Make the healthcheck request through `django.test.Client`
+        :return: tuple(int, str, float) Status code, response body and seconds taken """
+        from django.test import Client
+
+        url = urlsplit(healthcheck.url)
+        client = Client()
+        for name, value in (healthcheck.cookies or {}).items():
+            client.cookies[str(name)] = value
+
+        extra = {'HTTP_HOST': url.netloc, 'secure': url.scheme == 'https'}
+        content_type = 'application/octet-stream'
+        for name, value in (healthcheck.headers or {}).items():
+            if name.lower() == 'content-type':
+                content_type = value
+            else:
+                extra[str('HTTP_' + name.upper().replace('-', '_'))] = value
+
+        path = url.path + ('?' + url.query if url.query else '')
+        started = time.time()
+        response = client.generic(healthcheck.method, path, data=healthcheck.body or '', content_type=content_type,
+                                  **extra)
+        duration = time.time() - started
+        body = b''.join(response) if getattr(response, 'streaming', False) else response.content
+        return response.status_code, body.decode(response.charset or 'utf-8', 'replace'), duration
+
+
+class LiveRunner(LocalRunner):
+    """
+    Run healthchecks against the real host, or an override host, over a pooled HTTP session. Use it to confirm every
+    URL answers before publishing monitors that point at it.
+    """
+
+    DEFAULT_TIMEOUT = 10
+    """ :type int Seconds to wait when a healthcheck does not set timeout_seconds, the maximum Cronitor allows """
+
+    def __init__(self, concurrency=4, host=None, scheme=None):
+        """ concurrency (int): Number of healthchecks run at the same time, and the connection pool size
+        host (str): Optional host[:port] to send requests to instead of the healthcheck hostname. The original hostname
+                    is sent in the Host header.
+        scheme (str): Optional scheme, 'http' or 'https', to use instead of the healthcheck scheme """
+        super(LiveRunner, self).__init__(concurrency)
+        self.host = host
+        self.scheme = scheme
+        self._session = None
+
+    def run(self, healthchecks):
+        import requests
+
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        try:
+            return super(LiveRunner, self).run(healthchecks)
+        finally:
+            self._session.close()
+            self._session = None
+
+    def request(self, healthcheck):
+        """ Make the healthcheck request over HTTP, enforcing its timeout_seconds
+        :return: tuple(int, str, float) Status code, response body and seconds taken """
+        url = urlsplit(healthcheck.url)
+        headers = dict(healthcheck.headers or {})
+        if self.host:
+            headers.setdefault('Host', url.netloc)
+            url = url._replace(netloc=self.host)
+        if self.scheme:
+            url = url._replace(scheme=self.scheme)
+
+        started = time.time()
+        response = self._session.request(
+            healthcheck.method,
+            urlunsplit(url),
+            data=healthcheck.body,
+            headers=headers,
+            cookies=healthcheck.cookies,
+            timeout=healthcheck.timeout_seconds or self.DEFAULT_TIMEOUT,
+            allow_redirects=False,
+        )
+        return response.status_code, response.text, time.time() - started
+
+
+def evaluate(assertions, status, body, duration):
+    """ Evaluate healthcheck assertions against a response. Without a response_code assertion, any status below 400
+    passes. Unsupported rules are ignored.
+    assertions (list[dict]): Rules like {'rule_type': 'response_body', 'operator': 'contains', 'value': 'OK'}
+    status (int): Response status code
+    body (str): Response body
+    duration (float): Seconds taken to respond
+    :return: list[str] Assertions that did not hold """
+    failures = []
+    assertions = assertions or ()
+    if not any(rule.get('rule_type') == 'response_code' for rule in assertions) and status >= 400:
+        failures.append('response_code {} >= 400'.format(status))
+
+    for rule in assertions:
+        rule_type, value = rule.get('rule_type'), rule.get('value')
+        operator = OPERATOR_ALIASES.get(rule.get('operator'), rule.get('operator'))
+        if operator not in OPERATORS:
+            continue
+
+        try:
+            if rule_type == 'response_code':
+                actual, expected = status, int(value)
+            elif rule_type == 'response_time':
+                actual, expected = duration, float(value)
+            elif rule_type == 'response_body':
+                actual, expected = body, '{}'.format(value)
+            else:
+                continue
+
+            held = OPERATORS[operator](actual, expected)
+        except (TypeError, ValueError) as e:
+            # e.g. a response_time of '5 seconds', or `contains` on a response_code
+            failures.append('{} {} {} could not be evaluated: {}'.format(rule_type, rule.get('operator'), value, e))
+            continue
+
+        if not held:
+            failure = '{} {} {}'.format(rule_type, rule.get('operator'), value)
+            failures.append(failure if rule_type == 'response_body' else '{} (was {})'.format(failure, actual))
+
+    return failures
+
+
+def percentile(values, p):
+    """ Nearest-rank percentile
+    values (list[float]): Sorted values
+    p (int): Percentile, 0-100
+    :return: float|None """
+    if not values:
+        return None
+
+    return values[max(0, int(math.ceil(p / 100.0 * len(values))) - 1)]
+
+
+def run_local(healthchecks=None, concurrency=4):
+    """ Run every healthcheck defined in urls.py, along with any additional healthchecks, in-process. Draining
+    empties the queue, so additional healthchecks run here will not also be published by `put()`.
+    :return: RunSummary """
+    _healthchecks.populate()
+    for healthcheck in healthchecks or ():
+        _healthchecks.Client.enqueue(healthcheck)
+
+    return LocalRunner(concurrency).run(_healthchecks.Client.drain())
+
+
+def probe(healthchecks=None, host=None, scheme=None, concurrency=4):
+    """ Request the URL of every healthcheck defined in urls.py, along with any additional healthchecks, over the
+    network. Draining empties the queue, so additional healthchecks probed here will not also be published by `put()`.
+    :return: RunSummary """
+    _healthchecks.populate()
+    for healthcheck in healthchecks or ():
+        _healthchecks.Client.enqueue(healthcheck)
+
+    return LiveRunner(concurrency, host=host, scheme=scheme).run(_healthchecks.Client.drain())
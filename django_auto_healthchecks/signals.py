@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+from django.dispatch import Signal
+
+phase_timed = Signal()
+""" Sent for each timed phase of the publish pipeline when settings.HEALTHCHECKS['INSTRUMENTATION'] is enabled.
+Receivers are called with `phase` (str), `duration` (float seconds, or None for counts) and `details` (dict). """
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+""" HTTP transport for publishing. Imported on first publish so processes that only define healthchecks never load
+requests and urllib3. """
+import requests
+
+
+def build_session(pool_size):
+    """ Build a session whose connection pool is shared by concurrent batch uploads. urllib3 does not retry anything:
+    failed connections and error responses are retried by the client, so every attempt counts against the publish
+    deadline.
+    pool_size (int): Maximum connections kept open
+    :return: requests.Session """
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+from future.utils import string_types
+
+METHODS = ('GET', 'POST', 'PUT', 'HEAD', 'OPTIONS', 'PATCH')
+
+MAX_TIMEOUT_SECONDS = 10
+
+COLLECTIONS = (list, tuple, set)
+
+
+def validate(healthcheck):
+    """ Check a healthcheck definition against what the Cronitor API accepts. Every error is collected instead of
+    stopping at the first one.
+    healthcheck (Healthcheck|ResolvedHealthcheck): Definition to check
+    :return: list[str] Validation errors, empty when the definition is valid """
+    errors = []
+    if healthcheck.method not in METHODS:
+        errors.append('request method must be one of {}, not "{}"'.format(', '.join(METHODS), healthcheck.method))
+
+    for field in ('headers', 'cookies'):
+        if getattr(healthcheck, field) and not isinstance(getattr(healthcheck, field), dict):
+            errors.append('request {} must be a dict'.format(field))
+
+    errors.extend(_validate_seconds('timeout_seconds', healthcheck.timeout_seconds, MAX_TIMEOUT_SECONDS))
+    errors.extend(_validate_seconds('interval_seconds', healthcheck.interval_seconds))
+    errors.extend(validate_tags('tags', healthcheck.tags))
+    errors.extend(_validate_assertions(healthcheck.assertions))
+    return errors
+
+
+def validate_tags(label, tags):
+    """ label (str): How to refer to the tags in errors
+    tags (list|tuple|set): Tags to check, may be None
+    :return: list[str] Validation errors """
+    if not tags:
+        return []
+
+    if not isinstance(tags, COLLECTIONS):
+        return ['{} must be a list, tuple or set'.format(label)]
+
+    if not all(isinstance(tag, string_types) for tag in tags):
+        return ['{} must be strings'.format(label)]
+
+    return []
+
+
+def _validate_seconds(field, value, maximum=None):
+    """ :return: list[str] Validation errors for an optional whole number of seconds """
+    if value is None:
+        return []
+
+    # bool is an int subclass, but True is never a meaningful number of seconds
+    if not isinstance(value, int) or isinstance(value, bool):
+        return ['{} must be an int'.format(field)]
+
+    if maximum is not None and not 1 <= value <= maximum:
+        return ['{} must be between 1 and {}'.format(field, maximum)]
+
+    if value < 1:
+        return ['{} must be positive'.format(field)]
+
+    return []
+
+
+def _validate_assertions(assertions):
+    """ Assertions are sent to the API as monitor rules, e.g. {'rule_type': 'response_code', 'value': 200}
+    :return: list[str] Validation errors """
+    if not assertions:
+        return []
+
+    if not isinstance(assertions, COLLECTIONS):
+        return ['assertions must be a list, tuple or set']
+
+    errors = []
+    for i, rule in enumerate(assertions):
+        if not isinstance(rule, dict):
+            errors.append('assertion {} must be a dict'.format(i))
+            continue
+
+        if not isinstance(rule.get('rule_type'), string_types) or not rule['rule_type']:
+            errors.append('assertion {} must have a rule_type'.format(i))
+        if 'value' not in rule:
+            errors.append('assertion {} must have a value'.format(i))
+        if 'operator' in rule and not isinstance(rule['operator'], string_types):
+            errors.append('assertion {} operator must be a string'.format(i))
+
+    return errors
@@ -43,11 +43,16 @@ setup(
     url='https://github.com/cronitorio/django_auto_healthchecks',
     packages=[
         'django_auto_healthchecks',
+        'django_auto_healthchecks.management',
+        'django_auto_healthchecks.management.commands',
     ],
     package_dir={'django_auto_healthchecks':
                  'django_auto_healthchecks'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'zstd': ['zstandard'],
+    },
     license="MIT license",
     zip_safe=False,
     keywords='django_auto_healthchecks',
@@ -1,5 +1,172 @@
 # -*- coding: utf-8 -*-
+import json
+import socket
+import threading
+import zlib
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
 
 class MockSettings(object):
     def __init__(self, **kwargs):
         [self.__setattr__(key, val) for key, val in kwargs.items()]
+
+
+def configure_django():
+    """ Configure Django settings for tests that run real requests through the test client, e.g. tests.urls """
+    import django
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(
+            DEBUG=False,
+            ALLOWED_HOSTS=['*'],
+            ROOT_URLCONF='tests.urls',
+            SECRET_KEY='django_auto_healthchecks tests',
+            MIDDLEWARE=[],
+        )
+        django.setup()
+
+
+class LiveDjangoServer(object):
+    """ Serve the Django app configured by configure_django() over HTTP from a background thread """
+
+    def __init__(self):
+        from django.core.handlers.wsgi import WSGIHandler
+        from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+        class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, WSGIHandler(), ThreadingWSGIServer, QuietHandler)
+
+    @property
+    def host(self):
+        return '127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubCronitorServer(ThreadingMixIn, HTTPServer):
+    """ Local HTTP server standing in for the Cronitor API. Records every request it receives and responds with the
+    given status codes in order, then 200. A status may be a (status, headers) tuple. """
+    daemon_threads = True
+
+    def __init__(self, status_codes=()):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubCronitorHandler)
+        self.status_codes = list(status_codes)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/v3/monitors'.format(self.server_address[1])
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def record(self, handler, body):
+        with self.lock:
+            self.requests.append({'method': handler.command, 'headers': dict(handler.headers.items()), 'body': body})
+            return self.status_codes.pop(0) if self.status_codes else 200
+
+    def payloads(self):
+        """ :return: list Decoded JSON bodies of the requests received """
+        return [json.loads(self.decompress(request).decode('utf-8')) for request in self.requests]
+
+    @staticmethod
+    def decompress(request):
+        """ :return: bytes The request body, decompressed according to its Content-Encoding """
+        encoding = request['headers'].get('Content-Encoding')
+        if encoding == 'gzip':
+            return zlib.decompress(request['body'], 31)
+        if encoding == 'zstd':
+            import zstandard
+            return zstandard.ZstdDecompressor().decompressobj().decompress(request['body'])
+
+        return request['body']
+
+
+class UnresponsiveServer(object):
+    """ Socket that listens but never accepts, with its backlog filled so that new connections hang until they time
+    out. Connections to a full backlog are dropped silently on Linux; other platforms may refuse them instead. """
+
+    def __init__(self):
+        self.socket = socket.socket()
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.listen(0)
+        self.clients = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/v3/monitors'.format(self.socket.getsockname()[1])
+
+    def __enter__(self):
+        for _ in range(8):
+            client = socket.socket()
+            client.settimeout(0.1)
+            self.clients.append(client)
+            try:
+                client.connect(self.socket.getsockname())
+            except socket.timeout:
+                break
+        return self
+
+    def __exit__(self, *exc_info):
+        for client in self.clients:
+            client.close()
+        self.socket.close()
+
+
+class StubCronitorHandler(BaseHTTPRequestHandler):
+
+    def do_PUT(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = self._read_chunked()
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status = self.server.record(self, body)
+        status, headers = status if isinstance(status, tuple) else (status, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+            chunk = self.rfile.read(size)
+            self.rfile.readline()
+            if not size:
+                return b''.join(chunks)
+
+            chunks.append(chunk)
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+""" Namespaced URLs with attached healthchecks, discovered by the discovery tests """
+from django.conf.urls import include
+from django_auto_healthchecks.healthchecks import Healthcheck, re_path, url
+from .urls import ok
+
+billing = [
+    re_path(r'^invoices$', ok, name='invoices', healthcheck=Healthcheck(key='invoices')),
+    url(r'^plans$', ok, name='plans'),
+]
+
+accounts = [
+    url(r'^login$', ok, name='login', healthcheck=Healthcheck(key='login')),
+    url(r'^billing/', include((billing, 'billing'), namespace='billing')),
+]
+
+urlpatterns = [
+    url(r'^home$', ok, name='home', healthcheck=Healthcheck(key='home')),
+    url(r'^accounts/', include((accounts, 'accounts'), namespace='accounts')),
+]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.aio` asyncio publishing API.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import pytest
+import time
+asyncio = pytest.importorskip('asyncio')
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks import aio
+from . import MockSettings, StubCronitorServer, configure_django
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', side_effect=lambda route, **kwargs: '/' + route)
+def test_aput_uploads_batches(mock_reverse):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'cronitor.io', 'BATCH_SIZE': 2},
+            DEBUG=False
+        )
+        client = healthchecks.IdempotentHealthcheckClient()
+        client.enqueue(healthchecks.Healthcheck(route='queued'))
+        run(aio.AsyncHealthcheckClient(client).put([healthchecks.Healthcheck(route=r) for r in ('a', 'b', 'c')]))
+
+    assert len(server.requests) == 2, "Expected one request per batch"
+    assert len([d for p in server.payloads() for d in p]) == 4, "Expected queued and additional healthchecks"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_aput_does_not_block_event_loop(mock_reverse):
+    configure_django()
+    events = []
+
+    def slow_record(handler, body):
+        time.sleep(0.2)
+        return 200
+
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'cronitor.io'},
+            DEBUG=False
+        )
+        server.record = slow_record
+        loop = asyncio.new_event_loop()
+        try:
+            for delay in (0.01, 0.02, 0.03):
+                loop.call_later(delay, events.append, 'tick')
+
+            future = asyncio.ensure_future(aio.aput([healthchecks.Healthcheck(route='slow')]), loop=loop)
+            future.add_done_callback(lambda f: events.append('published'))
+            loop.run_until_complete(future)
+        finally:
+            loop.close()
+
+    assert events == ['tick', 'tick', 'tick', 'published'], "Expected the event loop to run while publishing"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_aput_publishes_like_put(mock_reverse, tmpdir):
+    configure_django()
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'cronitor.io', 'STORE': 'file',
+                      'STORE_DIR': str(tmpdir.join('store')), 'OUTBOX': True, 'OUTBOX_DIR': str(tmpdir.join('outbox')),
+                      'OUTBOX_RETRY_DELAY': None, 'RELEASE_AFTER_PUBLISH': True},
+        DEBUG=False
+    )
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url), \
+            mock.patch.object(healthchecks, 'release') as mock_release:
+        run(aio.aput([healthchecks.Healthcheck(route='ok')]))
+        healthchecks.Client._outbox().append([{'key': 'queued', 'name': 'queued'}], 'first')
+        run(aio.aput([healthchecks.Healthcheck(route='ok')]))
+
+    assert len(server.requests) == 1, "Expected nothing to be published when nothing changed"
+    assert not healthchecks.Client._outbox().pending(), "Expected the outbox to be replayed when nothing changed"
+    assert mock_release.call_count == 2, "Expected definitions to be released after publishing"
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.backends` stores.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import os
+import stat
+import pytest
+import django_auto_healthchecks.backends as backends
+from django_auto_healthchecks.outbox import Outbox
+
+
+@pytest.fixture
+def file_store(tmpdir):
+    return backends.FileStore(str(tmpdir.join('store')))
+
+
+@pytest.fixture
+def temp_dir(tmpdir):
+    with mock.patch('django_auto_healthchecks.backends.tempfile.gettempdir', return_value=str(tmpdir)):
+        yield tmpdir.join(backends.KEY_PREFIX)
+
+
+def test_file_store_set_and_get(file_store):
+    file_store.set('fingerprint', 'abc123')
+    assert file_store.get('fingerprint') == 'abc123', "Expected stored value"
+
+
+def test_file_store_get_missing_key_returns_default(file_store):
+    assert file_store.get('missing', 'default') == 'default', "Expected default for missing key"
+
+
+def test_file_store_add_only_succeeds_once(file_store):
+    assert file_store.add('lock', 1, 60), "Expected first add() to succeed"
+    assert not file_store.add('lock', 2, 60), "Expected second add() to fail"
+    assert file_store.get('lock') == 1, "Expected first value to be kept"
+
+
+def test_file_store_add_replaces_expired_entry(file_store):
+    assert file_store.add('lock', 1, 60)
+    with mock.patch('django_auto_healthchecks.backends.time.time', return_value=2e10):
+        assert file_store.add('lock', 2, 60), "Expected add() to replace a stale entry"
+        assert file_store.get('lock') == 2, "Expected the new value"
+
+
+def test_file_store_add_keeps_entry_replaced_while_removing_stale_one(file_store):
+    file_store.set('lock', 1, -1)
+    read_text = backends.FileStore._read_text
+
+    def replaced_after_read(path):
+        content = read_text(path)
+        if not replaced_after_read.done:
+            # Another process replaces the stale entry between the read and the rename
+            replaced_after_read.done = True
+            backends.FileStore(file_store.directory).set('lock', 2, 60)
+        return content
+
+    replaced_after_read.done = False
+    with mock.patch.object(backends.FileStore, '_read_text', side_effect=replaced_after_read):
+        assert not file_store.add('lock', 3, 60), "Expected the fresh entry to win"
+
+    assert file_store.get('lock') == 2, "Expected the fresh entry to be kept"
+    assert os.listdir(file_store.directory) == ['lock.json'], "Expected no files left behind"
+
+
+def test_file_store_delete(file_store):
+    file_store.set('key', 'value')
+    file_store.delete('key')
+    file_store.delete('key')
+    assert file_store.get('key') is None, "Expected key to be deleted"
+
+
+def test_get_store_disabled_by_default():
+    assert backends.get_store(None) is None, "Expected no store without a backend"
+
+
+def test_get_store_file_backend(tmpdir):
+    store = backends.get_store('file', directory=str(tmpdir))
+    assert isinstance(store, backends.FileStore), "Expected a FileStore"
+    assert store.directory == str(tmpdir), "Expected configured directory"
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='Directory owners are only checked on POSIX')
+def test_default_directory_is_private(temp_dir):
+    backends.FileStore().set('key', 'value')
+    assert stat.S_IMODE(os.stat(str(temp_dir)).st_mode) == 0o700, "Expected only the current user to have access"
+
+    os.chmod(str(temp_dir), 0o777)
+    assert Outbox().pending() is False
+    assert stat.S_IMODE(os.stat(str(temp_dir)).st_mode) == 0o700, "Expected a permissive directory to be restricted"
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='Directory owners are only checked on POSIX')
+def test_default_directory_of_another_user_is_refused(temp_dir):
+    temp_dir.mkdir()
+    with mock.patch('django_auto_healthchecks.backends.os.getuid', return_value=os.getuid() + 1):
+        with pytest.raises(OSError):
+            backends.FileStore().get('key')
+        with pytest.raises(OSError):
+            Outbox().append([{'key': 'a'}])
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='Directory owners are only checked on POSIX')
+def test_default_directory_symlink_is_refused(temp_dir, tmpdir):
+    os.symlink(str(tmpdir.mkdir('elsewhere')), str(temp_dir))
+    with pytest.raises(OSError):
+        backends.FileStore().set('key', 'value')
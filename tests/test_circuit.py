@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the circuit breaker shared by processes publishing healthchecks.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import logging
+import pytest
+import django_auto_healthchecks.backends as backends
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks.circuit import CircuitBreaker, OPEN_KEY
+from . import MockSettings, StubCronitorServer, configure_django
+
+
+@pytest.fixture
+def breaker(tmpdir):
+    return CircuitBreaker(backends.FileStore(str(tmpdir)), threshold=2, cooldown=60)
+
+
+def test_circuit_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    assert breaker.allow(), "Expected the circuit to stay closed below the threshold"
+
+    breaker.record_failure()
+    assert not breaker.allow(), "Expected the circuit to open"
+    assert breaker.opened_at() is not None, "Expected the time the circuit opened"
+
+
+def test_success_closes_circuit(breaker):
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow(), "Expected failures to be counted from the last success"
+
+
+def test_half_open_circuit_allows_a_single_probe(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.store.delete(OPEN_KEY)  # The cool-down has passed
+
+    assert breaker.allow(), "Expected one process to probe"
+    assert not breaker.allow(), "Expected other processes to wait for the probe"
+
+    breaker.record_failure()
+    assert breaker.opened_at() is not None, "Expected a failed probe to open the circuit again"
+
+
+def test_open_circuit_skips_publishing(tmpdir):
+    configure_django()
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'testserver', 'STORE': 'file', 'STORE_DIR': str(tmpdir),
+                      'MAX_RETRIES': 0, 'CIRCUIT_BREAKER_THRESHOLD': 2},
+        DEBUG=False
+    )
+    client = healthchecks.IdempotentHealthcheckClient()
+    client._flush_messages_to_log = lambda: ''
+    with StubCronitorServer(status_codes=[500, 500]) as server, \
+            mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        for _ in range(3):
+            client.put([healthchecks.Healthcheck(route='ok')])
+
+    assert len(server.requests) == 2, "Expected the third publish to be short-circuited"
+    assert 'Publishing resumes in 60s' in [msg for level, msg in client._messages if level == logging.WARN][-1], \
+        "Expected the skipped publish to be logged"
+
+
+def test_open_circuit_saves_healthchecks_to_outbox(tmpdir):
+    configure_django()
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'testserver', 'STORE': 'file', 'STORE_DIR': str(tmpdir),
+                      'CIRCUIT_BREAKER_THRESHOLD': 1, 'OUTBOX': True, 'OUTBOX_DIR': str(tmpdir.join('outbox')),
+                      'OUTBOX_RETRY_DELAY': None},
+        DEBUG=False
+    )
+    client = healthchecks.IdempotentHealthcheckClient()
+    client._flush_messages_to_log = lambda: ''
+    CircuitBreaker(backends.FileStore(str(tmpdir)), threshold=1, cooldown=60).record_failure()
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        client.put([healthchecks.Healthcheck(route='ok')])
+
+    assert not server.requests, "Expected the publish to be short-circuited"
+    entries, _ = client._outbox().claim()
+    assert [d['request']['url'] for d in entries[0]['definitions']] == ['http://testserver/ok'], \
+        "Expected the skipped healthchecks to be saved to the outbox"
+
+
+def test_outbox_flush_respects_circuit_breaker(tmpdir):
+    configure_django()
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'testserver', 'STORE': 'file', 'STORE_DIR': str(tmpdir),
+                      'CIRCUIT_BREAKER_THRESHOLD': 1, 'OUTBOX': True, 'OUTBOX_DIR': str(tmpdir.join('outbox')),
+                      'OUTBOX_RETRY_DELAY': None, 'MAX_RETRIES': 0},
+        DEBUG=False
+    )
+    client = healthchecks.IdempotentHealthcheckClient()
+    client._flush_messages_to_log = lambda: ''
+    breaker = CircuitBreaker(backends.FileStore(str(tmpdir)), threshold=1, cooldown=60)
+    with StubCronitorServer(status_codes=[500]) as server, \
+            mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        for _ in range(2):
+            client._save_to_outbox([{'key': 'a', 'name': 'a'}], 'first')
+        assert len(client._outbox()._read(client._outbox().path)) == 1, "Expected the same payload to be saved once"
+
+        assert client.flush_outbox() == 1, "Expected the failed replay to stay in the outbox"
+        assert not breaker.is_closed(), "Expected the failed replay to open the circuit"
+
+        assert client.flush_outbox() == 1, "Expected the outbox to be kept while the circuit is open"
+
+    assert len(server.requests) == 1, "Expected no replay while the circuit is open"
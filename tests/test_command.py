@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the `healthchecks` management command and the AUTO_PUBLISH setting.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import json
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.six import StringIO
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks.apps import HealthchecksAppConfig
+from django_auto_healthchecks.management.commands.healthchecks import Command
+from . import LiveDjangoServer, MockSettings, StubCronitorServer, configure_django
+
+
+@pytest.fixture
+def defined():
+    configure_django()
+    healthchecks.Client.drain()
+
+    def define(routes, **settings):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS=dict({'API_KEY': 'this is a key', 'HOSTNAME': 'testserver'}, **settings),
+            DEBUG=False
+        )
+        for route in routes:
+            healthchecks.Client.enqueue(healthchecks.Healthcheck(route=route))
+
+    yield define
+    healthchecks.Client.drain()
+
+
+def _call(*args, **options):
+    out = StringIO()
+    call_command(Command(), *args, stdout=out, stderr=StringIO(), **options)
+    return out.getvalue()
+
+
+def test_publish_sends_healthchecks(defined):
+    defined(['ok', 'echo'])
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        out = _call('publish')
+
+    assert 'Published 2 of 2' in out, "Expected publish count"
+    assert len(server.payloads()[0]) == 2, "Expected both healthchecks sent"
+
+
+def test_publish_fails_without_api_key(defined):
+    defined(['ok'], API_KEY=None)
+    with pytest.raises(CommandError):
+        _call('publish')
+
+
+def test_publish_succeeds_when_nothing_changed(defined, tmpdir):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        defined(['ok'], STORE='file', STORE_DIR=str(tmpdir), PUBLISH_LOCK_TIMEOUT=0)
+        _call('publish')
+        defined(['ok'], STORE='file', STORE_DIR=str(tmpdir), PUBLISH_LOCK_TIMEOUT=0)
+        out = _call('publish')
+
+    assert 'Nothing published' in out, "Expected an unchanged payload to be skipped"
+    assert len(server.requests) == 1, "Expected a single publish"
+
+
+def test_publish_fails_when_request_fails(defined):
+    defined(['ok'], MAX_RETRIES=0)
+    with StubCronitorServer(status_codes=[500]) as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        with pytest.raises(CommandError):
+            _call('publish')
+
+
+def test_diff_lists_added_changed_and_removed_keys(defined, tmpdir):
+    defined(['ok', 'echo'], STORE='file', STORE_DIR=str(tmpdir), DIFF_PUBLISH=True)
+    payload = healthchecks.Client._serialize(healthchecks.Client.drain())
+    previous = healthchecks._manifest(payload)
+    previous[payload[0]['key']] = 'outdated'
+    previous['gone'] = 'removed'
+    healthchecks.Client._remember_manifest(healthchecks.Client._store(), healthchecks._scope('this is a key'), previous)
+
+    defined(['ok', 'echo', 'error'], STORE='file', STORE_DIR=str(tmpdir), DIFF_PUBLISH=True)
+    lines = _call('diff').splitlines()
+    assert lines[0].startswith('~ {}'.format(payload[0]['key'])), "Expected changed healthcheck"
+    assert lines[1].startswith('+ '), "Expected added healthcheck"
+    assert lines[2] == '- gone', "Expected removed key"
+    assert lines[3] == '1 added, 1 changed, 1 removed, 1 unchanged.', "Unexpected summary"
+
+
+def test_diff_requires_store_and_diff_publish(defined, tmpdir):
+    defined(['ok'])
+    with pytest.raises(CommandError):
+        _call('diff')
+
+    defined(['ok'], STORE='file', STORE_DIR=str(tmpdir))
+    with pytest.raises(CommandError):
+        _call('diff')
+
+
+@mock.patch('requests.Session.put')
+def test_dry_run_prints_payload_without_publishing(mock_put, defined):
+    defined(['ok'])
+    payload = json.loads(_call('dry-run'))
+    assert payload[0]['request']['url'] == 'http://testserver/ok', "Expected serialized payload"
+    mock_put.assert_not_called()
+
+
+def test_export_writes_payload_to_file(defined, tmpdir):
+    defined(['ok', 'echo'])
+    output = tmpdir.join('healthchecks.json')
+    _call('export', output=str(output))
+    assert len(json.loads(output.read())) == 2, "Expected exported payload"
+
+
+def test_probe_requests_every_healthcheck(defined):
+    defined(['ok', 'error'])
+    with LiveDjangoServer() as server, pytest.raises(CommandError) as e:
+        _call('probe', host=server.host)
+
+    assert '1 healthchecks failed' in str(e.value), "Expected the error view to fail"
+
+
+def test_no_healthchecks_defined(defined):
+    defined([])
+    with pytest.raises(CommandError):
+        _call('dry-run')
+
+
+@mock.patch.object(healthchecks, 'put')
+def test_auto_publish_setting_disables_publishing_at_startup(mock_put, defined):
+    defined([], AUTO_PUBLISH=False)
+    HealthchecksAppConfig.ready(mock.Mock())
+    mock_put.assert_not_called()
+
+    defined([])
+    HealthchecksAppConfig.ready(mock.Mock())
+    mock_put.assert_called_once_with()
+
+
+def test_command_builds_definitions_when_disabled(defined):
+    defined([], DEFINITIONS=False)
+    assert healthchecks.Healthcheck(route='ok') is healthchecks.DISABLED_HEALTHCHECK
+
+    def populate():
+        healthchecks.Client.enqueue(healthchecks.Healthcheck(route='ok'))
+
+    with mock.patch('sys.argv', ['script.py']), mock.patch.object(healthchecks, 'populate', populate):
+        payload = json.loads(_call('dry-run'))
+
+    assert len(payload) == 1, "Expected the command to build definitions when called from code"
+    assert not healthchecks._running_command(), "Expected the flag to be reset"
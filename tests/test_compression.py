@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.compression` request body codecs.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import json
+import zlib
+import pytest
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks import compression
+from . import MockSettings, StubCronitorServer
+
+BODY = json.dumps([{'key': str(i), 'request': {'url': 'https://cronitor.io/'}, 'tags': ['Django']}
+                   for i in range(100)]).encode('utf-8')
+
+
+class ReversingCodec(compression.BaseCodec):
+    encoding = 'reversed'
+
+    def compress(self, data):
+        return data[::-1]
+
+
+def test_gzip_codec_round_trip():
+    compressed = compression.GzipCodec().compress(BODY)
+    assert zlib.decompress(compressed, 31) == BODY, "Expected gzip data"
+    assert len(compressed) < len(BODY) / 5, "Expected a repetitive payload to compress well"
+
+
+def test_zstd_codec_round_trip():
+    zstandard = pytest.importorskip('zstandard')
+    compressed = compression.ZstdCodec().compress(BODY)
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(compressed) == BODY, "Expected zstd data"
+
+
+def test_compress_stream_counts_sizes():
+    sizes = {}
+    chunks = [BODY[i:i + 500] for i in range(0, len(BODY), 500)]
+    compressed = b''.join(compression.compress_stream(chunks, compression.GzipCodec(), sizes))
+    assert zlib.decompress(compressed, 31) == BODY, "Expected the complete body"
+    assert sizes == {'raw': len(BODY), 'compressed': len(compressed)}, "Unexpected sizes"
+
+
+def test_get_codec():
+    assert compression.get_codec(None) is None, "Expected no codec when compression is disabled"
+    assert isinstance(compression.get_codec('gzip'), compression.GzipCodec), "Expected a GzipCodec"
+    assert isinstance(compression.get_codec('tests.test_compression.ReversingCodec'), ReversingCodec), \
+        "Expected a codec loaded from a dotted path"
+
+
+def _publish(healthcheck_count, **settings):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS=dict({'API_KEY': 'this is a key', 'HOSTNAME': 'cronitor.io'}, **settings),
+        DEBUG=True
+    )
+    client = healthchecks.IdempotentHealthcheckClient()
+    client._flush_messages_to_log = lambda: ''
+    payload = [dict(json.loads(BODY.decode('utf-8'))[0], key=str(i)) for i in range(healthcheck_count)]
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        client._send(payload, 'this is a key')
+
+    return server, client
+
+
+@pytest.mark.parametrize('stream_threshold', [None, 1])
+def test_publish_compresses_bodies_over_threshold(stream_threshold):
+    server, client = _publish(50, COMPRESSION='gzip', COMPRESSION_THRESHOLD=100, STREAM_THRESHOLD=stream_threshold)
+    assert server.requests[0]['headers'].get('Content-Encoding') == 'gzip', "Expected a gzip request body"
+    assert len(server.payloads()[0]) == 50, "Expected every healthcheck sent"
+    assert [msg for level, msg in client._messages if msg.startswith('Compressed healthchecks with gzip')], \
+        "Expected compressed and raw sizes to be logged"
+
+
+def test_publish_does_not_compress_small_bodies():
+    server, _ = _publish(1, COMPRESSION='gzip', COMPRESSION_THRESHOLD=10000)
+    assert 'Content-Encoding' not in server.requests[0]['headers'], "Expected an uncompressed request body"
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.discovery` URLconf walking.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+from django.test import override_settings
+import logging
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks import discovery, runner
+from . import MockSettings, StubCronitorServer, configure_django
+
+
+def setup_function(function):
+    configure_django()
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'testserver'}, DEBUG=False)
+    healthchecks.Client.drain()
+    healthchecks.Client._messages = []
+
+
+def test_discover_qualifies_routes_with_namespaces():
+    found = dict((h.key, h) for h in discovery.discover('tests.namespaced_urls'))
+    assert sorted(found) == ['home', 'invoices', 'login'], "Expected every attached healthcheck"
+    assert found['home'].route == 'home' and found['home'].current_app is None, "Unexpected top level route"
+    assert found['login'].route == 'accounts:login', "Expected namespaced route"
+    assert found['invoices'].route == 'accounts:billing:invoices', "Expected nested namespaced route"
+    assert found['invoices'].current_app == 'accounts:billing', "Expected current_app from namespaces"
+
+
+def test_discover_ignores_patterns_without_healthchecks():
+    assert discovery.discover('tests.urls') == [], "Expected no healthchecks"
+
+
+@override_settings(ROOT_URLCONF='tests.namespaced_urls')
+def test_populate_enqueues_resolvable_healthchecks_once():
+    healthchecks.populate()
+    healthchecks.populate()
+    resolved = dict((h.key, h.url) for h in healthchecks.Client.drain())
+    assert resolved == {
+        'home': 'http://testserver/home',
+        'login': 'http://testserver/accounts/login',
+        'invoices': 'http://testserver/accounts/billing/invoices',
+    }, "Expected namespaced routes to reverse"
+    assert not [m for level, m in healthchecks.Client._messages if level == logging.WARN], \
+        "Expected repeated populate() not to warn about duplicates"
+
+
+@override_settings(ROOT_URLCONF='tests.namespaced_urls')
+def test_put_publishes_healthchecks_defined_in_urlconf():
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'HOSTNAME': 'testserver', 'AUTO_PUBLISH': False},
+        DEBUG=False
+    )
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.put()
+
+    assert sorted(d['key'] for d in server.payloads()[0]) == ['home', 'invoices', 'login'], \
+        "Expected put() to publish the healthchecks attached in urls.py"
+
+
+@override_settings(ROOT_URLCONF='tests.namespaced_urls')
+def test_run_local_runs_healthchecks_defined_in_urlconf():
+    summary = runner.run_local()
+    assert sorted(r.healthcheck.key for r in summary.passed) == ['home', 'invoices', 'login'], \
+        "Expected run_local() to run the healthchecks attached in urls.py"
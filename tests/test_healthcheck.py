@@ -151,6 +151,24 @@ def test_monitor_tags_merged_with_settings_tags(mock_reverse):
     assert set(payload['tags']) == set(merged_tags), "Tags not merged as expected"
 
 
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_tags_are_sorted_deduplicated_and_shared(mock_reverse):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'HOSTNAME': 'cronitor.io', 'TAGS': ['Django', 'ExampleApp']},
+        DEBUG=False
+    )
+    payloads = []
+    for tags in (('LandingPages', 'Django'), ['Django', 'LandingPages'], {'LandingPages'}, None):
+        healthcheck = healthchecks.Healthcheck(tags=tags)
+        healthcheck.resolve()
+        payloads.append(healthcheck.serialize())
+
+    assert payloads[0]['tags'] == ('Django', 'ExampleApp', 'LandingPages'), "Expected sorted tags without duplicates"
+    assert payloads[0]['tags'] is payloads[1]['tags'] is payloads[2]['tags'], "Expected equal tags to be shared"
+    assert payloads[3]['tags'] == ('Django', 'ExampleApp'), "Expected the global tags"
+    assert json.loads(json.dumps(payloads[0]))['tags'] == ['Django', 'ExampleApp', 'LandingPages']
+
+
 @mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
 def test_serialized_payload_includes_default_parts(mock_reverse):
     healthchecks.settings = MockSettings(
@@ -184,3 +202,54 @@ def test_serialized_payload_includes_optional_parts(mock_reverse):
     assert 'tags' in payload_keys, "Request payload should have 'tags' field"
     assert 'note' in payload_keys, "Request payload should have 'note' field"
     assert 'name' in payload_keys, "Request payload should have 'name' field"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_route_resolver_memoizes_reverse(mock_reverse):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'cronitor.io'}, DEBUG=False)
+    resolver = healthchecks.RouteResolver()
+    for querystring in ({'a': 1}, {'b': 2}):
+        healthchecks.Healthcheck(route='example', kwargs={'id': 1}, querystring=querystring).resolve(resolver)
+    healthchecks.Healthcheck(route='example', kwargs={'id': 2}).resolve(resolver)
+
+    assert mock_reverse.call_count == 2, "Expected reverse() once per distinct route and kwargs"
+    assert resolver.stats() == {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3.0}, "Unexpected resolver stats"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.HealthcheckUrl._get_hostname', return_value='cronitor.io')
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', side_effect=lambda route, **kwargs: '/' + route)
+def test_route_resolver_looks_up_hostname_once(mock_reverse, mock_hostname):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HTTPS': True}, DEBUG=False)
+    resolver = healthchecks.RouteResolver()
+    for route in ('a', 'b', 'c'):
+        healthcheck = healthchecks.Healthcheck(route=route)
+        healthcheck.resolve(resolver)
+        assert healthcheck.serialize()['request']['url'] == 'https://cronitor.io/' + route, "Unexpected URL"
+
+    assert mock_hostname.call_count == 1, "Expected hostname to be looked up once"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_resolve_returns_immutable_resolved_healthcheck(mock_reverse):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'cronitor.io'}, DEBUG=False)
+    resolved = healthchecks.Healthcheck(headers={'X-Token': 'secret'}).resolve()
+    assert resolved.url == 'http://cronitor.io/path/to/endpoint', "Expected resolved URL"
+    assert resolved.display_name() == 'GET cronitor.io/path/to/endpoint', "Expected generated name"
+    assert not hasattr(resolved, '__dict__'), "Expected a slotted representation"
+    with pytest.raises(AttributeError):
+        resolved.key = 'changed'
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_resolved_healthchecks_compare_and_hash_by_definition(mock_reverse):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'cronitor.io'}, DEBUG=False)
+    first = healthchecks.Healthcheck(headers={'X-Token': 'secret'}).resolve()
+    second = healthchecks.Healthcheck(headers={'X-Token': 'secret'}).resolve()
+    assert first == second and len({first, second}) == 1, "Expected identical definitions to deduplicate"
+    assert first != second._replace(note='Changed'), "Expected changed definitions to differ"
+
+
+def test_freeze_requires_resolve():
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'cronitor.io'}, DEBUG=False)
+    with pytest.raises(healthchecks.HealthcheckError):
+        healthchecks.Healthcheck(route='example-route-name').freeze()
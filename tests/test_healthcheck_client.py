@@ -10,9 +10,13 @@ try:
 except ImportError:
     from unittest import mock
 
+import json
+import logging
+import sys
+import time
 import pytest
 import django_auto_healthchecks.healthchecks as healthchecks
-from . import MockSettings
+from . import MockSettings, StubCronitorServer, UnresponsiveServer, configure_django
 
 
 class MockRequestsResponse(object):
@@ -30,14 +34,15 @@ def healthcheck_instance():
         )
         self._defaultName = self._create_name()
         self.key = self.key if self.key else self._create_key()
+        return self.freeze()
 
     healthchecks.settings = MockSettings(HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=True)
     instance = healthchecks.Healthcheck()
-    instance.resolve = lambda: mock_resolve(instance)
+    instance.resolve = lambda *args: mock_resolve(instance)
     return instance
 
 
-@mock.patch('django_auto_healthchecks.healthchecks.requests.put')
+@mock.patch('requests.Session.put')
 def test_put_invokes_request(mock_put, healthcheck_instance):
     healthchecks.settings = MockSettings(HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=True, HOSTNAME='cronitor.io')
     healthchecks.Client.enqueue(healthcheck_instance)
@@ -45,7 +50,7 @@ def test_put_invokes_request(mock_put, healthcheck_instance):
     assert mock_put.call_count == 1, "requests.put not called once"
 
 
-@mock.patch('django_auto_healthchecks.healthchecks.requests.put')
+@mock.patch('requests.Session.put')
 def test_put_does_not_invoke_request_without_api_key(mock_put, healthcheck_instance):
     healthchecks.settings = MockSettings(HEALTHCHECKS={}, DEBUG=True, HOSTNAME='cronitor.io')
     healthchecks.Client.enqueue(healthcheck_instance)
@@ -53,9 +58,13 @@ def test_put_does_not_invoke_request_without_api_key(mock_put, healthcheck_insta
     assert mock_put.call_count == 0, "Unexpected call to requests.put"
 
 
-@mock.patch('django_auto_healthchecks.healthchecks.requests.put', return_value=MockRequestsResponse(status_code=500))
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=500))
 def test_request_failure_raises_healthcheck_error(mock_put, healthcheck_instance):
-    healthchecks.settings = MockSettings(HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=False, HOSTNAME='cronitor.io')
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'MAX_RETRIES': 0},
+        DEBUG=False,
+        HOSTNAME='cronitor.io'
+    )
     healthchecks.Client.enqueue(healthcheck_instance)
     healthchecks.Client._flush_messages_to_log = lambda: ''
     healthchecks.Client.put()
@@ -72,3 +81,372 @@ def test_drain_queue_drains_the_queue(healthcheck_instance):
     assert len(healthchecks.Client.drain()) == 0, "Expected empty drain() on second attempt"
 
 
+@mock.patch('requests.Session.put')
+def test_put_enqueues_additional_healthchecks(mock_put, healthcheck_instance):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=True, HOSTNAME='cronitor.io')
+    healthchecks.Client.put([healthcheck_instance])
+    assert mock_put.call_count == 1, "requests.put not called once"
+    assert len(_sent_payload(mock_put)) == 1, "Expected additional healthcheck in payload"
+
+
+@mock.patch('requests.Session.put')
+def test_put_in_background_mode_publishes_from_thread(mock_put, healthcheck_instance):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'PUBLISH_MODE': 'background'},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    client = healthchecks.IdempotentHealthcheckClient()
+    client.enqueue(healthcheck_instance)
+    client.put()
+    assert len(client._threads) == 1, "Expected a background publisher thread"
+    client.join()
+    assert mock_put.call_count == 1, "requests.put not called once"
+    assert len(client._threads) == 0, "Expected publisher thread to be joined"
+
+
+@mock.patch('requests.Session.put')
+def test_put_with_invalid_publish_mode_does_not_invoke_request(mock_put, healthcheck_instance):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'PUBLISH_MODE': 'eventually'},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    client = healthchecks.IdempotentHealthcheckClient()
+    client._flush_messages_to_log = lambda: ''
+    client.enqueue(healthcheck_instance)
+    client.put()
+    assert mock_put.call_count == 0, "Unexpected call to requests.put"
+    assert 'PUBLISH_MODE' in client._messages[0][1], "Expected an error about PUBLISH_MODE"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=200))
+def test_put_skipped_when_another_process_holds_publish_lock(mock_put, healthcheck_instance, tmpdir):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir)},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    first, second = healthchecks.IdempotentHealthcheckClient(), healthchecks.IdempotentHealthcheckClient()
+    first.put([healthcheck_instance])
+    second.put([healthcheck_instance])
+    assert mock_put.call_count == 1, "Expected only one process to publish"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=500))
+def test_publish_lock_released_after_request_failure(mock_put, healthcheck_instance, tmpdir):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir), 'MAX_RETRIES': 0},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    first, second = healthchecks.IdempotentHealthcheckClient(), healthchecks.IdempotentHealthcheckClient()
+    first.put([healthcheck_instance])
+    second.put([healthcheck_instance])
+    assert mock_put.call_count == 2, "Expected a retry after the first publisher failed"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=200))
+def test_put_skipped_when_payload_unchanged_since_last_publish(mock_put, healthcheck_instance, tmpdir):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir), 'PUBLISH_LOCK_TIMEOUT': 0},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+    assert mock_put.call_count == 1, "Expected unchanged payload to be published once"
+
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance], force=True)
+    assert mock_put.call_count == 2, "Expected force=True to bypass the fingerprint check"
+
+
+def test_payload_published_again_after_changing_back(healthcheck_instance, tmpdir):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir)},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        for note in ('A', 'B', 'A'):
+            healthcheck_instance.note = note
+            healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+
+    assert [p[0]['note'] for p in server.payloads()] == ['A', 'B', 'A'], "Expected every change to be published"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=200))
+def test_publish_state_is_kept_per_api_key_and_endpoint(mock_put, healthcheck_instance, tmpdir):
+    def publish(api_key):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': api_key, 'STORE': 'file', 'STORE_DIR': str(tmpdir), 'PUBLISH_LOCK_TIMEOUT': 0,
+                          'DIFF_PUBLISH': True},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+
+    publish('this is a key')
+    publish('another key')
+    assert mock_put.call_count == 2, "Expected the payload to be published to the second account"
+
+    with mock.patch.object(healthchecks, 'ENDPOINT_URL', 'https://example.com/v3/monitors'):
+        publish('another key')
+    assert mock_put.call_count == 3, "Expected the payload to be published to the second endpoint"
+
+    publish('this is a key')
+    assert mock_put.call_count == 3, "Expected the payload to be unchanged for the first account"
+    assert not [f for f in tmpdir.listdir() if 'key' in f.basename or 'key' in f.read()], "Expected hashed API keys"
+
+
+def test_force_publishes_despite_publish_lock(healthcheck_instance, tmpdir):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir)},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+        healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance], force=True)
+        assert len(server.requests) == 2, "Expected force=True to publish again"
+
+        client = healthchecks.IdempotentHealthcheckClient()
+        with mock.patch.object(client, '_acquire_publish_lock', return_value=False):
+            client.put([healthcheck_instance], force=True)
+
+    assert len(server.requests) == 3, "Expected force=True to publish while another process holds the lock"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=200))
+def test_force_publish_setting_bypasses_fingerprint_check(mock_put, healthcheck_instance, tmpdir):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir), 'PUBLISH_LOCK_TIMEOUT': 0,
+                      'FORCE_PUBLISH': True},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+    assert mock_put.call_count == 2, "Expected FORCE_PUBLISH to publish every time"
+
+
+def test_diff_reports_changed_and_removed_definitions():
+    previous = {'a': 'digest-a', 'b': 'digest-b', 'c': 'digest-c'}
+    payload = [{'key': 'a'}, {'key': 'b'}, {'key': 'd'}]
+    manifest = {'a': 'digest-a', 'b': 'changed', 'd': 'digest-d'}
+    changed, removed = healthchecks._diff(payload, manifest, previous)
+    assert [d['key'] for d in changed] == ['b', 'd'], "Expected only changed and added definitions"
+    assert removed == ['c'], "Expected removed key to be reported"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=200))
+def test_diff_publish_sends_only_changed_definitions(mock_put, healthcheck_instance, tmpdir):
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'STORE': 'file', 'STORE_DIR': str(tmpdir), 'PUBLISH_LOCK_TIMEOUT': 0,
+                      'DIFF_PUBLISH': True},
+        DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    other = healthchecks.Healthcheck(key='other', note='Unchanged')
+    other.resolve = lambda *args: healthcheck_instance.resolve()._replace(key='other', note='Unchanged')
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance, other])
+    assert len(_sent_payload(mock_put)) == 2, "Expected full payload on first publish"
+
+    healthcheck_instance.note = 'Updated note'
+    healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance, other])
+    assert mock_put.call_count == 2, "Expected changed healthchecks to be published"
+    assert [d['key'] for d in _sent_payload(mock_put)] == [healthcheck_instance.key], \
+        "Expected only the changed healthcheck to be sent"
+
+
+def test_batches_split_payload():
+    payload = [{'key': str(i)} for i in range(5)]
+    assert healthchecks._batches(payload, None) == [payload], "Expected a single batch without a batch size"
+    assert [len(b) for b in healthchecks._batches(payload, 2)] == [2, 2, 1], "Expected batches of at most 2"
+
+
+def test_put_uploads_batches_concurrently(healthcheck_instance):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'BATCH_SIZE': 2, 'PUBLISH_CONCURRENCY': 2},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        client = healthchecks.IdempotentHealthcheckClient()
+        client.put([_keyed_instance(healthcheck_instance, key) for key in 'abcde'])
+
+    assert len(server.requests) == 3, "Expected one request per batch"
+    assert sorted(d['key'] for p in server.payloads() for d in p) == list('abcde'), "Expected every healthcheck sent"
+
+
+def test_failed_batch_does_not_fail_other_batches(healthcheck_instance, tmpdir):
+    with StubCronitorServer(status_codes=[500]) as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'BATCH_SIZE': 2, 'PUBLISH_CONCURRENCY': 1, 'MAX_RETRIES': 0,
+                          'STORE': 'file', 'STORE_DIR': str(tmpdir), 'DIFF_PUBLISH': True},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        client = healthchecks.IdempotentHealthcheckClient()
+        client._flush_messages_to_log = lambda: ''
+        client.put([_keyed_instance(healthcheck_instance, key) for key in 'abcd'])
+        errors = [msg for level, msg in client._messages if level == logging.ERROR]
+        assert len(errors) == 1 and 'batch 1/2' in errors[0], "Expected the first batch to fail alone"
+
+        client.put([_keyed_instance(healthcheck_instance, key) for key in 'abcd'])
+
+    assert [d['key'] for d in server.payloads()[-1]] == ['a', 'b'], "Expected only the failed batch to be resent"
+
+
+def _sent_payload(mock_put):
+    data = mock_put.call_args[1]['data']
+    return json.loads((data if isinstance(data, bytes) else b''.join(data)).decode('utf-8'))
+
+
+def _keyed_instance(template, key):
+    instance = healthchecks.Healthcheck(key=key)
+    instance.resolve = lambda *args: template.resolve()._replace(key=key)
+    return instance
+
+
+def test_put_retries_throttled_and_server_errors(healthcheck_instance):
+    with StubCronitorServer(status_codes=[503, 429]) as server, \
+            mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'RETRY_BACKOFF': 0.01},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        client = healthchecks.IdempotentHealthcheckClient()
+        client._flush_messages_to_log = lambda: ''
+        client.put([healthcheck_instance])
+
+    assert len(server.requests) == 3, "Expected two retries before success"
+    assert not [msg for level, msg in client._messages if level == logging.ERROR], "Unexpected publish error"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.time.sleep')
+def test_put_honors_retry_after(mock_sleep, healthcheck_instance):
+    with StubCronitorServer(status_codes=[(429, {'Retry-After': '2'})]) as server, \
+            mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=True, HOSTNAME='cronitor.io'
+        )
+        healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+
+    assert mock_sleep.call_args == ((2.0,),), "Expected to wait for the Retry-After interval"
+    assert len(server.requests) == 2, "Expected one retry"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.time.sleep')
+def test_put_does_not_retry_past_deadline(mock_sleep, healthcheck_instance):
+    with StubCronitorServer(status_codes=[(503, {'Retry-After': '120'})]) as server, \
+            mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'PUBLISH_DEADLINE': 10},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        healthchecks.IdempotentHealthcheckClient().put([healthcheck_instance])
+
+    assert mock_sleep.call_count == 0, "Expected no retry past the publish deadline"
+    assert len(server.requests) == 1, "Expected a single request"
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='Needs connections to a full backlog to hang')
+def test_hanging_connections_do_not_outlast_deadline():
+    with UnresponsiveServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'CONNECT_TIMEOUT': 0.6, 'MAX_RETRIES': 3, 'RETRY_BACKOFF': 0.01,
+                          'PUBLISH_DEADLINE': 1, 'BATCH_SIZE': 1, 'PUBLISH_CONCURRENCY': 1},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        client = healthchecks.IdempotentHealthcheckClient()
+        started = time.time()
+        published = client._send([{'key': 'a'}, {'key': 'b'}], 'this is a key')
+        elapsed = time.time() - started
+
+    assert published == [], "Expected nothing to be published"
+    assert elapsed < 1.5, "Expected publishing to stop at the deadline, took {:.2f}s".format(elapsed)
+    assert len([msg for level, msg in client._messages if level == logging.ERROR]) == 2, "Expected both batches to fail"
+
+
+def test_retry_after_parses_seconds_and_dates():
+    response = MockRequestsResponse(status_code=429)
+    response.headers = {'Retry-After': '3'}
+    assert healthchecks._retry_after(response) == 3.0, "Expected Retry-After seconds"
+    response.headers = {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    assert healthchecks._retry_after(response) == 0.0, "Expected a past Retry-After date to mean no wait"
+    response.headers = {}
+    assert healthchecks._retry_after(response) is None, "Expected None without a Retry-After header"
+
+
+def test_large_batches_are_streamed_in_chunks(healthcheck_instance):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url), \
+            mock.patch.object(healthchecks, 'STREAM_CHUNK_SIZE', 256):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS={'API_KEY': 'this is a key', 'STREAM_THRESHOLD': 3},
+            DEBUG=True,
+            HOSTNAME='cronitor.io'
+        )
+        healthchecks.IdempotentHealthcheckClient().put([_keyed_instance(healthcheck_instance, key) for key in 'abcd'])
+
+    assert server.requests[0]['headers'].get('Transfer-Encoding') == 'chunked', "Expected a chunked request body"
+    assert [d['key'] for d in server.payloads()[0]] == list('abcd'), "Expected every healthcheck sent"
+
+
+def test_stream_encodes_payload_incrementally():
+    payload = [{'key': str(i), 'request': {'url': 'https://cronitor.io/{}'.format(i)}} for i in range(50)]
+    chunks = list(healthchecks._stream(payload, chunk_size=200))
+    assert len(chunks) > 1, "Expected several chunks"
+    assert json.loads(b''.join(chunks).decode('utf-8')) == payload, "Expected the complete JSON array"
+    assert json.loads(b''.join(healthchecks._stream([])).decode('utf-8')) == [], "Expected an empty array"
+
+
+@mock.patch('requests.Session.put', return_value=MockRequestsResponse(status_code=200))
+def test_debug_payload_dump_only_when_debug_logging_enabled(mock_put, healthcheck_instance):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=True, HOSTNAME='cronitor.io')
+    client = healthchecks.IdempotentHealthcheckClient()
+    client._flush_messages_to_log = lambda: ''
+    client.put([healthcheck_instance])
+    assert not [msg for level, msg in client._messages if msg.startswith('PUT ')], "Unexpected payload dump"
+
+    healthchecks.settings = MockSettings(
+        HEALTHCHECKS={'API_KEY': 'this is a key', 'FORCE_PUBLISH': True, 'DEBUG_PAYLOAD_LIMIT': 20}, DEBUG=True,
+        HOSTNAME='cronitor.io'
+    )
+    logger = logging.getLogger(healthchecks.__name__)
+    level = logger.level
+    logger.setLevel(logging.DEBUG)
+    try:
+        client.put([healthcheck_instance])
+    finally:
+        logger.setLevel(level)
+
+    dumps = [msg for level, msg in client._messages if msg.startswith('PUT ')]
+    assert len(dumps) == 1 and 'truncated to 20 characters' in dumps[0], "Expected a truncated payload dump"
+
+
+def test_settings_snapshot_is_reused_until_drained():
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'API_KEY': 'this is a key'}, DEBUG=True)
+    snapshot = healthchecks._settings()
+    healthchecks.settings.HEALTHCHECKS = {'API_KEY': 'another key'}
+    assert healthchecks._settings() is snapshot, "Expected the snapshot to be reused"
+    assert healthchecks._get_setting('API_KEY') == 'this is a key', "Expected the snapshot value"
+
+    healthchecks.IdempotentHealthcheckClient().drain()
+    assert healthchecks._get_setting('API_KEY') == 'another key', "Expected a new snapshot for each drain"
+
+
+def test_settings_snapshot_invalidated_when_settings_change():
+    configure_django()
+    from django.conf import settings
+    from django.test import override_settings
+
+    with mock.patch.object(healthchecks, 'settings', settings):
+        assert healthchecks._get_setting('API_KEY') is None
+        with override_settings(HEALTHCHECKS={'API_KEY': 'this is a key'}):
+            assert healthchecks._get_setting('API_KEY') == 'this is a key', "Expected the changed setting"
+
+        assert healthchecks._get_setting('API_KEY') is None, "Expected the restored setting"
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests that importing `django_auto_healthchecks` to define healthchecks does not load the publishing stack.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DJANGO_PRELOADED = 'import django.urls, django.conf.urls'
+""" Modules every Django project has imported before its urls.py, so they do not count towards the budget """
+
+DEFERRED = ('requests', 'urllib3', 'chardet', 'charset_normalizer', 'idna', 'multiprocessing.pool', 'asyncio',
+            'concurrent.futures', 'email.utils', 'tempfile', 'json', 'hashlib', 'base64', 'random',
+            'future.standard_library', 'django_auto_healthchecks.backends', 'django_auto_healthchecks.compression',
+            'django_auto_healthchecks.transport', 'django_auto_healthchecks.outbox', 'django_auto_healthchecks.circuit',
+            'django_auto_healthchecks.instrumentation', 'django_auto_healthchecks.aio',
+            'django_auto_healthchecks.validation')
+""" Modules only needed to publish """
+
+IMPORT_BUDGET_MS = 35
+""" Time allowed to import the package on top of Django. Publishing dependencies alone used to take over 60ms. """
+
+
+def _python(code, *options):
+    return subprocess.check_output(
+        [sys.executable] + list(options) + ['-c', code], cwd=ROOT, stderr=subprocess.STDOUT
+    ).decode('utf-8')
+
+
+def test_import_defers_publishing_dependencies():
+    loaded = json.loads(_python(
+        DJANGO_PRELOADED + '; import json, sys; before = set(sys.modules); import django_auto_healthchecks; '
+        'print(json.dumps(sorted(set(sys.modules) - before)))'
+    ).splitlines()[-1])
+    assert [m for m in DEFERRED if m in loaded] == [], "Expected publishing dependencies to be imported lazily"
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='-X importtime requires Python 3.7')
+def test_import_time_budget():
+    timings = []
+    for _ in range(3):
+        output = _python(DJANGO_PRELOADED + '; import django_auto_healthchecks', '-X', 'importtime')
+        cumulative = re.search(r'\|\s*(\d+) \| django_auto_healthchecks$', output, re.MULTILINE)
+        timings.append(int(cumulative.group(1)) / 1000.0)
+
+    assert min(timings) < IMPORT_BUDGET_MS, "Import took {:.1f}ms, over the {}ms budget".format(
+        min(timings), IMPORT_BUDGET_MS
+    )
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.instrumentation` publish pipeline timings.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks import instrumentation, signals
+from . import MockSettings, StubCronitorServer
+
+
+def publish(extra_settings):
+    with StubCronitorServer() as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url), \
+            mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint'):
+        settings = {'API_KEY': 'this is a key', 'HOSTNAME': 'cronitor.io'}
+        settings.update(extra_settings)
+        healthchecks.settings = MockSettings(HEALTHCHECKS=settings, DEBUG=False)
+        healthchecks.IdempotentHealthcheckClient().put([healthchecks.Healthcheck(route='a')])
+
+
+def test_callback_receives_every_phase():
+    calls = []
+    publish({'INSTRUMENTATION': True, 'INSTRUMENTATION_CALLBACK': lambda *args: calls.append(args)})
+    assert [call[0] for call in calls] == ['enqueue', 'drain', 'serialize', 'encode', 'http'], "Unexpected phases"
+    assert calls[0][2] == {'count': 1}, "Expected enqueue volume"
+    assert calls[3][2]['bytes'] > 0, "Expected encoded payload size"
+    assert calls[4][2]['status'] == 200, "Expected HTTP status"
+
+
+def test_signal_sent_for_each_phase():
+    receiver = mock.Mock()
+    signals.phase_timed.connect(receiver)
+    try:
+        publish({'INSTRUMENTATION': True})
+    finally:
+        signals.phase_timed.disconnect(receiver)
+
+    phases = [call[1]['phase'] for call in receiver.call_args_list]
+    assert phases == ['enqueue', 'drain', 'serialize', 'encode', 'http'], "Unexpected phases"
+
+
+@mock.patch.object(instrumentation.Instrumentation, 'emit')
+def test_nothing_emitted_when_disabled(mock_emit):
+    publish({})
+    assert mock_emit.call_count == 0, "Unexpected instrumentation when disabled"
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the outbox of healthchecks that could not be published.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import os
+import stat
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.six import StringIO
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks.management.commands.healthchecks import Command
+from django_auto_healthchecks.outbox import Outbox, coalesce
+from . import MockSettings, StubCronitorServer, configure_django
+
+
+@pytest.fixture
+def outbox(tmpdir):
+    return Outbox(str(tmpdir.join('outbox')))
+
+
+@pytest.fixture
+def client(tmpdir):
+    configure_django()
+
+    def configure(**settings):
+        healthchecks.settings = MockSettings(
+            HEALTHCHECKS=dict({'API_KEY': 'this is a key', 'HOSTNAME': 'testserver', 'OUTBOX': True,
+                               'OUTBOX_DIR': str(tmpdir.join('outbox')), 'OUTBOX_RETRY_DELAY': None,
+                               'MAX_RETRIES': 0}, **settings),
+            DEBUG=False
+        )
+        client = healthchecks.IdempotentHealthcheckClient()
+        client._flush_messages_to_log = lambda: ''
+        return client
+
+    return configure
+
+
+def _definition(key, name=None):
+    return {'key': key, 'name': name or key}
+
+
+def test_claim_returns_entries_once(outbox):
+    outbox.append([_definition('a')], 'first')
+    outbox.append([_definition('b')], 'second')
+    assert outbox.pending(), "Expected pending entries"
+
+    entries, claims = outbox.claim()
+    assert [e['fingerprint'] for e in entries] == ['first', 'second'], "Expected entries oldest first"
+    assert outbox.claim() == ([], []), "Expected claimed entries not to be claimed again"
+
+    outbox.done(claims)
+    assert not outbox.pending(), "Expected the outbox to be empty"
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='File modes are only checked on POSIX')
+def test_outbox_file_is_readable_by_owner_only(outbox):
+    outbox.append([_definition('a')], 'first')
+    assert stat.S_IMODE(os.stat(outbox.path).st_mode) == 0o600, "Expected definitions to be private to the owner"
+
+
+def test_stale_claims_are_claimed_again(outbox):
+    outbox.append([_definition('a')], 'first')
+    _, claims = outbox.claim()
+    os.utime(claims[0], (0, 0))
+
+    entries, _ = outbox.claim()
+    assert [e['fingerprint'] for e in entries] == ['first'], "Expected an abandoned claim to be replayed"
+
+
+def test_corrupt_lines_are_skipped(outbox):
+    outbox.append([_definition('a')], 'first')
+    with open(outbox.path, 'a') as f:
+        f.write('{"time": 1, "defin')
+
+    entries, _ = outbox.claim()
+    assert len(entries) == 1, "Expected the incomplete line to be skipped"
+
+
+def test_newest_fingerprint(outbox):
+    assert outbox.newest_fingerprint() is None, "Expected no fingerprint for an empty outbox"
+    outbox.append([_definition('a')], 'first')
+    outbox.append([_definition(str(i), 'x' * 100) for i in range(100)], 'second')
+    assert outbox.newest_fingerprint() == 'second', "Expected the fingerprint of the last entry"
+
+
+def test_coalesce_keeps_newest_definition_per_key():
+    entries = [
+        {'fingerprint': 'first', 'definitions': [_definition('a', 'old'), _definition('b')]},
+        {'fingerprint': 'second', 'definitions': [_definition('a', 'new'), _definition('c')]},
+        {'fingerprint': 'published', 'definitions': [_definition('d')]},
+    ]
+    pending = coalesce(entries, superseded=['c'], published_fingerprint='published')
+    assert [(d['name'], f) for d, f in pending] == [('b', 'first'), ('new', 'second')], "Unexpected replay"
+
+    pending = coalesce(entries, superseded=['c'], published_fingerprint='published', current=['a', 'c', 'd'])
+    assert [d['name'] for d, _ in pending] == ['new'], "Expected keys removed since to be dropped"
+
+
+def test_failed_publish_is_saved_to_outbox(client):
+    publisher = client()
+    with StubCronitorServer(status_codes=[500]) as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        publisher.put([healthchecks.Healthcheck(route='ok')])
+
+    entries, _ = publisher._outbox().claim()
+    assert [d['request']['url'] for d in entries[0]['definitions']] == ['http://testserver/ok'], "Expected definition"
+
+
+def test_successful_publish_drops_removed_healthchecks_from_outbox(client, tmpdir):
+    publisher = client(STORE='file', STORE_DIR=str(tmpdir.join('store')))
+    with StubCronitorServer(status_codes=[500]) as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        publisher.put([healthchecks.Healthcheck(route='ok'), healthchecks.Healthcheck(route='echo')])
+        publisher.put([healthchecks.Healthcheck(route='ok')])
+
+    assert len(server.payloads()) == 2, "Expected the removed healthcheck not to be replayed"
+    assert not publisher._outbox().pending(), "Expected the outbox to be empty"
+
+
+def test_flush_replays_outbox(client):
+    publisher = client()
+    with StubCronitorServer(status_codes=[500]) as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        publisher.put([healthchecks.Healthcheck(route='ok'), healthchecks.Healthcheck(route='echo')])
+        assert publisher.flush_outbox() == 0, "Expected nothing left in the outbox"
+
+    assert [d['request']['url'] for d in server.payloads()[1]] == ['http://testserver/ok', 'http://testserver/echo'], \
+        "Expected the healthchecks that failed to be replayed"
+
+
+def test_background_flush_backs_off_until_published(client):
+    publisher = client(OUTBOX_RETRY_DELAY=1)
+    publisher._outbox().append([_definition('a')], 'first')
+    with StubCronitorServer(status_codes=[500]) as server, \
+            mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url), \
+            mock.patch('django_auto_healthchecks.healthchecks.time.sleep') as mock_sleep:
+        publisher._flush_outbox_with_backoff(1)
+
+    assert mock_sleep.call_args_list == [((1,),), ((2,),)], "Expected the delay to double after a failure"
+    assert len(server.requests) == 2 and not publisher._outbox().pending(), "Expected the outbox to be replayed"
+
+
+def test_flush_outbox_command(client):
+    client()._outbox().append([_definition('a')], 'first')
+    with StubCronitorServer(status_codes=[500]) as server, mock.patch.object(healthchecks, 'ENDPOINT_URL', server.url):
+        with pytest.raises(CommandError):
+            call_command(Command(), 'flush-outbox', stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command(Command(), 'flush-outbox', stdout=out, stderr=StringIO())
+
+    assert '0 healthchecks left' in out.getvalue(), "Expected the outbox to be replayed"
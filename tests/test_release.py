@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for releasing healthcheck definitions after publishing, and for definition-free worker processes.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import gc
+import sys
+import types
+import pytest
+from django.test import override_settings
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks import discovery
+from . import MockSettings, configure_django
+
+URLCONF = 'tests_release_urls'
+
+ROUTES = 10000
+
+
+def noop(request, *args, **kwargs):
+    pass
+
+
+def setup_function(function):
+    configure_django()
+    _settings()
+    healthchecks.Client.release()
+
+
+def teardown_function(function):
+    sys.modules.pop(URLCONF, None)
+    healthchecks.Client.release()
+
+
+def _settings(**settings):
+    healthchecks.settings = MockSettings(HEALTHCHECKS=dict({'HOSTNAME': 'testserver'}, **settings), DEBUG=False)
+
+
+def _install_urlconf(n):
+    """ Install a urls.py module with a healthcheck on each of N routes """
+    module = types.ModuleType(str(URLCONF))
+    module.urlpatterns = [
+        healthchecks.url(r'^r{}/$'.format(i), noop, name='route-{}'.format(i), healthcheck=healthchecks.Healthcheck(
+            querystring={'q': i}, tags=['generated'], assertions=[{'rule_type': 'response_code', 'value': 200}]
+        ))
+        for i in range(n)
+    ]
+    sys.modules[URLCONF] = module
+    return module
+
+
+def _retained(build):
+    """ Bytes still allocated after calling build(), while its return value is alive """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, kept
+    finally:
+        tracemalloc.stop()
+
+
+@override_settings(ROOT_URLCONF=URLCONF)
+def test_release_detaches_healthchecks_and_clears_client():
+    _install_urlconf(3)
+    healthchecks.populate()
+    healthchecks.release()
+    assert discovery.discover() == [], "Expected no healthchecks attached to patterns"
+    assert healthchecks.Client.drain() == [], "Expected an empty queue"
+
+
+@override_settings(ROOT_URLCONF=URLCONF)
+@mock.patch.object(healthchecks.Client, 'put')
+def test_put_releases_definitions_when_configured(mock_put):
+    _install_urlconf(3)
+    healthchecks.put()
+    assert len(discovery.discover()) == 3, "Expected healthchecks kept by default"
+
+    _settings(RELEASE_AFTER_PUBLISH=True)
+    healthchecks.put()
+    assert discovery.discover() == [], "Expected healthchecks released after publishing"
+
+
+@override_settings(ROOT_URLCONF=URLCONF)
+def test_definition_free_mode_builds_no_healthchecks():
+    _settings(DEFINITIONS=False)
+    _install_urlconf(3)
+    assert healthchecks.Healthcheck(route='route-1') is healthchecks.DISABLED_HEALTHCHECK, "Expected placeholder"
+    assert discovery.discover() == [], "Expected no healthchecks attached to patterns"
+
+    healthchecks.Client.enqueue(healthchecks.Healthcheck(route='route-1'))
+    assert healthchecks.Client.drain() == [], "Expected placeholder not to be enqueued"
+
+
+@pytest.mark.skipif(tracemalloc is None, reason='tracemalloc requires Python 3.4')
+@override_settings(ROOT_URLCONF=URLCONF)
+def test_memory_saved_per_worker_at_10k_routes():
+    def released():
+        module = _install_urlconf(ROUTES)
+        healthchecks.populate()
+        healthchecks.release()
+        return module
+
+    defined, _ = _retained(lambda: _install_urlconf(ROUTES))
+    after_release, _ = _retained(released)
+    _settings(DEFINITIONS=False)
+    definition_free, _ = _retained(lambda: _install_urlconf(ROUTES))
+
+    saved_by_release = (defined - after_release) / ROUTES
+    saved_by_definition_free = (defined - definition_free) / ROUTES
+    assert saved_by_release > 500, "Expected release() to save memory per route: {:.0f} bytes of {:.0f}".format(
+        saved_by_release, defined / ROUTES
+    )
+    assert saved_by_definition_free > 500, "Expected definition-free mode to save memory per route: {:.0f} bytes " \
+                                           "of {:.0f}".format(saved_by_definition_free, defined / ROUTES)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.runner` local and live healthcheck runners.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import pytest
+import requests
+import django_auto_healthchecks.healthchecks as healthchecks
+from django_auto_healthchecks import runner
+from . import LiveDjangoServer, MockSettings, configure_django
+
+
+@pytest.fixture
+def resolved():
+    configure_django()
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'testserver'}, DEBUG=False)
+
+    def resolve(route, **kwargs):
+        return healthchecks.Healthcheck(route=route, **kwargs).resolve()
+
+    return resolve
+
+
+def test_runner_passes_healthy_checks(resolved):
+    summary = runner.LocalRunner().run([
+        resolved('ok', assertions=[{'rule_type': 'response_body', 'operator': 'contains', 'value': 'Cosmo'}]),
+        resolved('slow', assertions=[{'rule_type': 'response_time', 'operator': 'less_than', 'value': 5}]),
+    ])
+    assert len(summary.passed) == 2, "Expected every healthcheck to pass: {}".format(summary)
+    assert summary.percentiles['p50'] is not None, "Expected latency percentiles"
+
+
+def test_runner_reports_failed_assertions_and_status(resolved):
+    summary = runner.LocalRunner().run([
+        resolved('ok', assertions=[{'rule_type': 'response_body', 'operator': 'contains', 'value': 'Spacely'}]),
+        resolved('error'),
+    ])
+    assert len(summary.failed) == 2, "Expected both healthchecks to fail"
+    assert 'response_body contains Spacely' in summary.failed[0].failures[0], "Expected failed body assertion"
+    assert 'response_code 500' in summary.failed[1].failures[0], "Expected failed default status assertion"
+
+
+def test_runner_reports_rules_that_cannot_be_evaluated(resolved):
+    summary = runner.LocalRunner().run([
+        resolved('ok', assertions=[{'rule_type': 'response_time', 'operator': '<', 'value': '5 seconds'},
+                                   {'rule_type': 'response_code', 'operator': 'contains', 'value': 200}]),
+        resolved('ok'),
+    ])
+    assert len(summary.passed) == 1, "Expected the other healthcheck to run: {}".format(summary)
+    assert [f.split(' could not be evaluated')[0] for f in summary.failed[0].failures] == [
+        'response_time < 5 seconds', 'response_code contains 200'
+    ], "Expected each rule to be reported as a failure"
+
+
+def test_runner_sends_method_body_headers_cookies_and_querystring(resolved):
+    healthcheck = resolved('echo', method='POST', body='payload', headers={'X-Token': 'secret'},
+                           cookies={'session': 'abc'}, querystring={'q': 'search'})
+    status, body, _ = runner.LocalRunner().request(healthcheck)
+    assert status == 200, "Unexpected status"
+    assert body == 'POST payload secret abc search', "Expected request details to reach the view"
+
+
+def test_evaluate_response_code_assertion_replaces_default():
+    failures = runner.evaluate([{'rule_type': 'response_code', 'operator': 'eq', 'value': '503'}], 503, '', 0.1)
+    assert failures == [], "Expected explicit response_code assertion to pass"
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert runner.percentile(values, 50) == 50.0
+    assert runner.percentile(values, 99) == 99.0
+    assert runner.percentile([], 50) is None
+
+
+def test_live_runner_requests_override_host(resolved):
+    with LiveDjangoServer() as server:
+        summary = runner.LiveRunner(host=server.host).run([
+            resolved('ok', assertions=[{'rule_type': 'response_body', 'operator': 'contains', 'value': 'Cosmo'}]),
+            resolved('echo', method='PUT', body='payload', headers={'X-Token': 'secret'}, cookies={'session': 'abc'},
+                     querystring={'q': 'search'},
+                     assertions=[{'rule_type': 'response_body', 'operator': 'eq',
+                                  'value': 'PUT payload secret abc search'}]),
+            resolved('error'),
+        ])
+
+    assert [r.healthcheck.display_name() for r in summary.passed] == ['GET testserver/ok', 'PUT testserver/echo'], \
+        "Unexpected results: {}".format(summary)
+    assert [r.status for r in summary.failed] == [500], "Expected the failing route to be reported"
+    assert summary.percentiles['p99'] is not None, "Expected latency percentiles"
+
+
+def test_live_runner_enforces_timeout_seconds(resolved):
+    healthcheck = resolved('ok', timeout_seconds=3)
+    live = runner.LiveRunner(host='127.0.0.1:1')
+    with mock.patch('requests.Session.request', side_effect=requests.Timeout('timed out')) as mock_request:
+        summary = live.run([healthcheck])
+
+    assert mock_request.call_args[1]['timeout'] == 3, "Expected timeout_seconds to be the request timeout"
+    assert 'Timeout' in summary.failed[0].error, "Expected timeout to be reported as an error"
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 """
-Tests for `django_auto_healthchecks.healthchecks.url` function, a proxy for django `django.conf.urls.url`.
+Tests for `django_auto_healthchecks.healthchecks.url`, `path` and `re_path` functions, proxies for the django functions.
 """
 
 try:
@@ -10,6 +10,7 @@ try:
 except ImportError:
     from unittest import mock
 
+import pytest
 import django_auto_healthchecks.healthchecks as healthchecks
 from . import MockSettings
 
@@ -24,11 +25,12 @@ def test_url_calls_django_url(mock_url):
 
 @mock.patch('django_auto_healthchecks.healthchecks.Client.enqueue')
 @mock.patch('django_auto_healthchecks.healthchecks.django_url')
-def test_url_enqueues_healthcheck(mock_url, mock_enqueue):
+def test_url_attaches_healthcheck_to_pattern(mock_url, mock_enqueue):
     healthchecks.settings = MockSettings(DEBUG=True)
-    url_args = ('regex', 'view', healthchecks.Healthcheck())
-    healthchecks.url(*url_args)
-    assert mock_enqueue.call_count == 1, "Mock Client.enqueue not called once"
+    healthcheck = healthchecks.Healthcheck()
+    pattern = healthchecks.url('regex', 'view', healthcheck)
+    assert pattern.healthcheck is healthcheck, "Expected healthcheck attached to the pattern"
+    assert mock_enqueue.call_count == 0, "Healthchecks are enqueued by populate(), not url()"
     assert mock_url.call_count == 1, "Mock django_url not called once"
 
 
@@ -39,7 +41,6 @@ def test_url_strips_healthcheck_before_calling_django_url(mock_url, mock_enqueue
     url_args = ('regex', 'view', healthchecks.Healthcheck())
     expected_django_args = ('regex', 'view')
     healthchecks.url(*url_args)
-    assert mock_enqueue.call_count == 1, "Mock Client.enqueue not called once"
     assert mock_url.call_count == 1, "Mock django_url not called once"
     assert mock_url.call_args == (expected_django_args,), "Expected args not passed to mock django_url"
 
@@ -82,6 +83,28 @@ def test_url_without_healthcheck_param(mock_url, mock_enqueue):
 def test_route_name_added_to_healthcheck(mock_url, mock_enqueue):
     healthchecks.settings = MockSettings(DEBUG=True)
     route_name = 'test-route'
-    healthchecks.url('regex', 'view', healthchecks.Healthcheck(), name=route_name)
-    assert mock_enqueue.call_count == 1, "Mock Client.enqueue not called once"
-    assert mock_enqueue.call_args[0][0].route == route_name, "Mock Client.enqueue not called once"
+    pattern = healthchecks.url('regex', 'view', healthchecks.Healthcheck(), name=route_name)
+    assert pattern.healthcheck.route == route_name, "Route name not added to healthcheck"
+
+
+def test_re_path_attaches_healthcheck_to_pattern():
+    healthchecks.settings = MockSettings(DEBUG=True)
+    healthcheck = healthchecks.Healthcheck()
+    pattern = healthchecks.re_path(r'^regex$', lambda request: None, healthcheck, name='test-route')
+    assert pattern.healthcheck is healthcheck, "Expected healthcheck attached to the pattern"
+    assert healthcheck.route == 'test-route', "Route name not added to healthcheck"
+
+
+@pytest.mark.skipif(healthchecks.django_path is None, reason='django.urls.path() requires Django 2.0')
+def test_path_attaches_healthcheck_to_pattern():
+    healthchecks.settings = MockSettings(DEBUG=True)
+    healthcheck = healthchecks.Healthcheck()
+    pattern = healthchecks.path('articles/<int:year>/', lambda request: None, healthcheck, name='articles')
+    assert pattern.healthcheck is healthcheck, "Expected healthcheck attached to the pattern"
+    assert healthcheck.route == 'articles', "Route name not added to healthcheck"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.django_path', None)
+def test_path_raises_exception_before_django_2():
+    with pytest.raises(healthchecks.HealthcheckError):
+        healthchecks.path('route/', 'view')
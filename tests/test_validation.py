@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `django_auto_healthchecks.validation` and validation of drained healthchecks.
+"""
+
+try:
+    import mock
+except ImportError:
+    from unittest import mock
+
+import logging
+import pytest
+import django_auto_healthchecks.healthchecks as healthchecks
+import django_auto_healthchecks.validation as validation
+from . import MockSettings
+
+
+@pytest.fixture
+def define():
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'cronitor.io'}, DEBUG=False)
+    return lambda **kwargs: healthchecks.Healthcheck(route='route', **kwargs)
+
+
+def test_valid_healthcheck_has_no_errors(define):
+    healthcheck = define(method='post', headers={'Accept': 'text/plain'}, tags=('a', 'b'), timeout_seconds=10,
+                         interval_seconds=60, assertions=[{'rule_type': 'response_code', 'value': 200}])
+    assert validation.validate(healthcheck) == [], "Expected a valid healthcheck"
+
+
+def test_every_error_is_collected(define):
+    errors = validation.validate(define(method='FETCH', cookies='a=b', timeout_seconds=30, tags='tag',
+                                        assertions=[{'value': 200}, 'response_code']))
+    assert errors == [
+        'request method must be one of GET, POST, PUT, HEAD, OPTIONS, PATCH, not "FETCH"',
+        'request cookies must be a dict',
+        'timeout_seconds must be between 1 and 10',
+        'tags must be a list, tuple or set',
+        'assertion 0 must have a rule_type',
+        'assertion 1 must be a dict',
+    ], "Expected every validation error"
+
+
+@pytest.mark.parametrize('value,error', [
+    (True, 'interval_seconds must be an int'),
+    ('60', 'interval_seconds must be an int'),
+    (0, 'interval_seconds must be positive'),
+])
+def test_seconds_must_be_positive_ints(define, value, error):
+    assert validation.validate(define(interval_seconds=value)) == [error]
+
+
+def test_validation_result_is_cached(define):
+    healthcheck = define(method='FETCH')
+    with mock.patch.object(validation, 'validate', return_value=['error']) as mock_validate:
+        healthcheck.validate()
+        healthcheck.validate()
+
+    assert mock_validate.call_count == 1, "Expected the healthcheck to be validated once"
+
+
+@mock.patch('django_auto_healthchecks.healthchecks.reverse', return_value='/path/to/endpoint')
+def test_drain_drops_invalid_healthchecks_and_logs_every_error(mock_reverse, define):
+    client = healthchecks.IdempotentHealthcheckClient()
+    client.enqueue(define(name='valid'))
+    client.enqueue(define(name='first', method='FETCH'))
+    client.enqueue(define(name='second', timeout_seconds=11, tags=[1]))
+
+    assert [h.name for h in client.drain()] == ['valid'], "Expected invalid healthchecks to be dropped"
+    errors = [msg for level, msg in client._messages if level == logging.ERROR]
+    assert len(errors) == 1, "Expected a single error message"
+    assert errors[0].splitlines()[1:] == [
+        'first: request method must be one of GET, POST, PUT, HEAD, OPTIONS, PATCH, not "FETCH"',
+        'second: timeout_seconds must be between 1 and 10; tags must be strings',
+    ], "Expected every error of every healthcheck"
+
+
+def test_invalid_settings_tags_raise_healthcheck_error(define):
+    healthchecks.settings = MockSettings(HEALTHCHECKS={'HOSTNAME': 'cronitor.io', 'TAGS': 'tag'}, DEBUG=False)
+    with pytest.raises(healthchecks.HealthcheckError):
+        healthchecks.IdempotentHealthcheckClient()._serialize([])
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+""" URLs served to healthchecks run by the runner tests """
+from django.conf.urls import url
+from django.http import HttpResponse
+import time
+
+
+def ok(request):
+    return HttpResponse('OK Cosmo')
+
+
+def echo(request):
+    return HttpResponse('{} {} {} {} {}'.format(
+        request.method,
+        request.body.decode('utf-8'),
+        request.META.get('HTTP_X_TOKEN', ''),
+        request.COOKIES.get('session', ''),
+        request.GET.get('q', ''),
+    ))
+
+
+def error(request):
+    return HttpResponse('Broken', status=500)
+
+
+def slow(request):
+    time.sleep(0.05)
+    return HttpResponse('OK')
+
+
+urlpatterns = [
+    url(r'^ok$', ok, name='ok'),
+    url(r'^echo$', echo, name='echo'),
+    url(r'^error$', error, name='error'),
+    url(r'^slow$', slow, name='slow'),
+]